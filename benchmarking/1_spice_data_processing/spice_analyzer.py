@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import matplotlib.pyplot as plt
 
+# Kernel backends (numpy / numba) live next to the ant benchmark
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '3_comparison_to_python'))
+from kernels import get_kernel
+from alloc_profiler import AllocationProfiler
+
 def parse_ngspice_raw_txt(filepath):
     """
     Parses a raw ngspice text output file (like 'output_data.txt')
@@ -182,7 +188,7 @@ def parse_ngspice_raw_txt(filepath):
 # The analyze_spice_output and if __name__ == "__main__": blocks remain unchanged
 # as they call the parse_ngspice_raw_txt function.
 
-def analyze_spice_output(filepath="output_data.txt", VCC_OPAMP=5.0, VEE_OPAMP=0.0):
+def analyze_spice_output(filepath="output_data.txt", VCC_OPAMP=5.0, VEE_OPAMP=0.0, backend="numpy"):
     """
     Analyzes the ngspice output data to extract neuron metrics.
     Now uses the custom parse_ngspice_raw_txt function.
@@ -191,6 +197,7 @@ def analyze_spice_output(filepath="output_data.txt", VCC_OPAMP=5.0, VEE_OPAMP=0.
         filepath (str): Path to the ngspice output_data.txt file.
         VCC_OPAMP (float): Value of the positive op-amp supply voltage (from .param).
         VEE_OPAMP (float): Value of the negative op-amp supply voltage (from .param).
+        backend (str): Kernel backend for spike detection, "numpy" or "numba".
 
     Returns:
         dict: A dictionary containing extracted metrics (firing rate, energy per spike, etc.).
@@ -220,11 +227,9 @@ def analyze_spice_output(filepath="output_data.txt", VCC_OPAMP=5.0, VEE_OPAMP=0.
     schmitt_high_threshold = VCC_OPAMP * 0.8  # e.g., 80% of VCC_OPAMP
     schmitt_low_threshold = VEE_OPAMP + (VCC_OPAMP - VEE_OPAMP) * 0.2 # e.g., 20% from VEE (if VEE is 0, then 20% of VCC)
 
-    spike_times = []
     # Look for rising edge of Vcomp_out to detect a spike
-    for i in range(1, len(vcomp_out)):
-        if vcomp_out[i-1] < schmitt_high_threshold and vcomp_out[i] >= schmitt_high_threshold:
-            spike_times.append(time[i])
+    rising_edges = get_kernel("rising_edges", backend)
+    spike_times = time[rising_edges(vcomp_out, schmitt_high_threshold)]
 
     num_spikes = len(spike_times)
 
@@ -270,8 +275,19 @@ if __name__ == "__main__":
     VEE_OPAMP_VAL = 0.0
 
     output_file_path = "example_output_data.txt"
-
-    analysis_results = analyze_spice_output(output_file_path, VCC_OPAMP_VAL, VEE_OPAMP_VAL)
+    MEMORY_PROFILE = False # tracemalloc profile of parsing and analysis (peak memory, top allocation sites)
+
+    if MEMORY_PROFILE:
+        profiler = AllocationProfiler()
+        with profiler.phase("parse") as record:
+            parsed = parse_ngspice_raw_txt(output_file_path)
+            record["steps"] = None if parsed is None else len(parsed) # per-sample figures
+        del parsed
+        with profiler.phase("analyze"):
+            analysis_results = analyze_spice_output(output_file_path, VCC_OPAMP_VAL, VEE_OPAMP_VAL)
+        print(profiler.format_report())
+    else:
+        analysis_results = analyze_spice_output(output_file_path, VCC_OPAMP_VAL, VEE_OPAMP_VAL)
 
     if analysis_results:
         print("\n--- Analysis Results ---")
@@ -0,0 +1,144 @@
+import math
+import os
+import numpy as np
+
+# Shared Grünwald–Letnikov coefficient store.
+# Coefficients are generated once per (alpha, length, convention) with a vectorized
+# cumprod and handed out as read-only arrays, so every neuron built with the same
+# parameters points at the same memory. With a cache directory the arrays are also
+# written as .npy files and memory-mapped, so sweep workers can start without
+# recomputing million-length kernels.
+
+# Conventions (each reproduces, bit for bit, the loop it replaced):
+#   "gl"         w[0] = 1, w[k] = w[k-1] * (1 - (1+alpha)/k)          (simulate_GL, fast_gl)
+#   "gl_history" c[0] = -alpha, c[j] = (1 - (alpha+1)/(j+1)) * c[j-1]  (FractionalLIFNeuron)
+#   "binomial"   b[0] = 1, b[k] = b[k-1] * ((alpha - (k-1)) / k)       (simulate_fractional)
+CONVENTIONS = ("gl", "gl_history", "binomial")
+
+# Optional default on-disk cache, e.g. GL_COEFF_CACHE_DIR=/tmp/gl_cache
+DEFAULT_CACHE_DIR = os.environ.get("GL_COEFF_CACHE_DIR")
+
+_coefficient_cache = {}
+
+def _build_coefficients(alpha, length, convention):
+    if length == 0:
+        return np.zeros(0, dtype=np.float64)
+    k = np.arange(1, length, dtype=np.float64)
+    if convention == "gl":
+        first, factors = 1.0, 1 - (1+alpha)/k
+    elif convention == "gl_history":
+        first, factors = -alpha, 1.0 - (alpha + 1.0)/(k + 1.0)
+    else: # binomial
+        first, factors = 1.0, (alpha - (k-1)) / k
+    # cumprod multiplies left to right exactly like the original recurrences
+    return np.cumprod(np.concatenate(([first], factors)))
+
+def _cache_path(cache_dir, alpha, length, convention):
+    return os.path.join(cache_dir, f"gl_{convention}_alpha{alpha!r}_n{length}.npy")
+
+def _load_or_build_on_disk(alpha, length, convention, cache_dir):
+    path = _cache_path(cache_dir, alpha, length, convention)
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, _build_coefficients(alpha, length, convention))
+        os.replace(tmp_path, path) # atomic, so concurrent workers never read a partial file
+    return np.load(path, mmap_mode="r")
+
+def get_gl_coefficients(alpha, length, convention="gl_history", cache_dir=DEFAULT_CACHE_DIR, dtype=np.float64):
+    """
+    Returns the shared, read-only coefficient array for (alpha, length, convention).
+    Coefficients are always generated in float64; other dtypes are a shared cast of that.
+    Do not write to it; copy first if a modified kernel is needed.
+    """
+    if convention not in CONVENTIONS:
+        raise ValueError(f"Unknown GL coefficient convention '{convention}', expected one of {CONVENTIONS}")
+    dtype = np.dtype(dtype)
+    if dtype != np.float64:
+        key = (float(alpha), int(length), convention, dtype.str)
+        coeffs = _coefficient_cache.get(key)
+        if coeffs is None:
+            coeffs = get_gl_coefficients(alpha, length, convention, cache_dir).astype(dtype)
+            coeffs.setflags(write=False)
+            _coefficient_cache[key] = coeffs
+        return coeffs
+
+    key = (float(alpha), int(length), convention)
+    coeffs = _coefficient_cache.get(key)
+    if coeffs is None:
+        if cache_dir is not None and length > 0:
+            coeffs = _load_or_build_on_disk(*key, cache_dir)
+        else:
+            coeffs = _build_coefficients(*key)
+            coeffs.setflags(write=False)
+        _coefficient_cache[key] = coeffs
+    return coeffs
+
+def preload_gl_coefficients(alpha, length, convention, coeffs):
+    # Installs an existing float64 array (e.g. a view of shared memory set up by a parent
+    # process) as the store entry, so get_gl_coefficients hands it out instead of rebuilding
+    if convention not in CONVENTIONS:
+        raise ValueError(f"Unknown GL coefficient convention '{convention}', expected one of {CONVENTIONS}")
+    if coeffs.dtype != np.float64 or coeffs.shape != (length,):
+        raise ValueError(f"Expected {length} float64 coefficients, got {coeffs.shape} {coeffs.dtype}")
+    coeffs.setflags(write=False)
+    _coefficient_cache[(float(alpha), int(length), convention)] = coeffs
+
+def clear_gl_coefficient_cache():
+    # Drops the in-memory store (on-disk files are left in place)
+    _coefficient_cache.clear()
+
+# --- Short-memory truncation ---
+# For 0 < alpha <= 1 every GL weight after w[0] is <= 0 and the weights sum to zero, so
+# the mass dropped by keeping only w[1..L] has the closed form
+#   sum_{k>L} |w[k]| = prod_{k=1}^{L} (1 - alpha/k) = Gamma(L+1-alpha) / (Gamma(1-alpha) Gamma(L+1))
+# which decays like L**-alpha. Times max|V| it bounds the per-step error of the history sum.
+
+def gl_truncated_mass(alpha, length):
+    # Mass of the GL weights beyond the first `length` history coefficients (w[1..length])
+    if not 0 < alpha <= 1:
+        raise ValueError(f"Short-memory bound needs 0 < alpha <= 1, got alpha={alpha}")
+    if alpha == 1:
+        return 1.0 if length == 0 else 0.0
+    return math.exp(math.lgamma(length + 1 - alpha) - math.lgamma(1 - alpha) - math.lgamma(length + 1))
+
+def memory_length_for_tolerance(alpha, tol):
+    # Smallest L with gl_truncated_mass(alpha, L) <= tol (the mass is decreasing in L)
+    if tol <= 0:
+        raise ValueError(f"Memory tolerance must be positive, got {tol}")
+    hi = 1
+    while gl_truncated_mass(alpha, hi) > tol:
+        hi *= 2
+    lo = 0
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if gl_truncated_mass(alpha, mid) <= tol:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+def memory_truncation_diagnostics(alpha, tol, reference_length, max_length=None):
+    """
+    Memory length chosen for `tol` (clamped to `max_length`, e.g. the number of steps
+    actually simulated), the bound on the truncated GL mass at that length and the
+    expected speedup of the history sum over a fixed `reference_length` (the sum and its
+    history traffic are linear in the memory length). `tolerance_met` is False when the
+    clamp leaves the mass above `tol`; `exceeds_reference` flags tolerances that need
+    more memory than the reference length, i.e. are slower rather than faster.
+    """
+    required_length = memory_length_for_tolerance(alpha, tol)
+    memory_length = required_length if max_length is None else min(required_length, max_length)
+    return {
+        "alpha": alpha,
+        "tolerance": tol,
+        "required_length": required_length,
+        "memory_length": memory_length,
+        "truncated_mass_bound": gl_truncated_mass(alpha, memory_length),
+        "tolerance_met": memory_length == required_length,
+        "reference_length": reference_length,
+        "reference_truncated_mass": gl_truncated_mass(alpha, reference_length),
+        "exceeds_reference": required_length > reference_length,
+        "expected_speedup": reference_length / max(memory_length, 1),
+    }
@@ -0,0 +1,410 @@
+import importlib.util
+import warnings
+import numpy as np
+
+# Pluggable compute backends for the simulation inner loops.
+# Every kernel has a pure-NumPy implementation ("numpy", the reference) and may have a
+# loop implementation that is JIT-compiled with numba ("numba"). Model classes ask for
+# get_kernel(name, backend) once and keep calling the returned function, so the public
+# classes do not change with the backend. If numba is not installed, asking for the
+# "numba" backend falls back to the NumPy kernel with a warning. numba itself is only
+# imported (and a kernel only compiled) the first time a numba kernel is requested, so
+# importing the models stays cheap for callers that never use that backend.
+#
+# Both implementations of every kernel must pass check_kernel_equivalence():
+#     python kernels.py
+
+BACKENDS = ("numpy", "numba")
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+_kernels = {}
+_uncompiled = {} # (name, "numba") -> Python function, compiled on first get_kernel
+_warned_fallbacks = set()
+
+def register_kernel(name, backend):
+    def decorator(fn):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        impl = fn
+        if backend == "numba":
+            # Without numba the kernel is simply not registered
+            impl = None
+            if NUMBA_AVAILABLE:
+                _uncompiled[(name, backend)] = fn
+        _kernels.setdefault(name, {})[backend] = impl
+        return fn
+    return decorator
+
+def _compiled(name, backend):
+    impl = _kernels[name].get(backend)
+    if impl is None and (name, backend) in _uncompiled:
+        import numba
+        # numba.njit still compiles for the argument types on the first call
+        impl = _kernels[name][backend] = numba.njit(_uncompiled.pop((name, backend)))
+    return impl
+
+def get_kernel(name, backend="numpy"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    impls = _kernels[name]
+    impl = _compiled(name, backend)
+    if impl is None:
+        if (name, backend) not in _warned_fallbacks:
+            warnings.warn(f"No '{backend}' implementation of kernel '{name}' (is numba installed?), "
+                          f"using the numpy one")
+            _warned_fallbacks.add((name, backend))
+        impl = impls["numpy"]
+    return impl
+
+def available_kernels():
+    return {name: sorted(b for b, impl in impls.items() if impl is not None or (name, b) in _uncompiled)
+            for name, impls in _kernels.items()}
+
+# --- FractionalLIFNeuron.update (exact GL memory, ring-buffer history) ---
+# The new voltage is written into the history slot first and read back, so it is rounded
+# to the history dtype before the threshold test (a no-op for float64).
+
+@register_kernel("flif_update", "numpy")
+def flif_update_numpy(V, history_buffer, head, memory_length, coeffs, input_current, kernel,
+                      tau_m, bias, V_th, V_reset):
+    history_component = np.dot(coeffs, history_buffer[head:head + memory_length])
+    V_new = ((-V / tau_m) + bias + input_current) * kernel - history_component
+
+    head = (head - 1) % memory_length
+    history_buffer[head] = V_new
+    spike = 0
+    if history_buffer[head] >= V_th:
+        spike = 1
+        history_buffer[head] = V_reset
+    history_buffer[head + memory_length] = history_buffer[head]
+    return history_buffer[head], spike, head
+
+# numba compiles the whole update, np.dot on the contiguous window included, so the
+# numba backend is the same function without the per-call Python overhead
+register_kernel("flif_update", "numba")(flif_update_numpy)
+
+# --- FractionalLIFPopulation.step / FractionalLIFGroups.step (after the GL history sum) ---
+# Voltage update, threshold test and reset of every neuron, in place on V and spike_states.
+# The history sum itself stays a BLAS gemv in the population (faster than a compiled loop
+# for these narrow L x size windows); the numba loop removes the per-call overhead of the
+# half dozen NumPy operations that follow it.
+
+@register_kernel("flif_population_update", "numpy")
+def flif_population_update_numpy(V, history_component, input_currents, kernel, tau_m, bias, V_th, V_reset,
+                                 spike_states):
+    effective_dV_dt_part = (-V / tau_m) + bias + input_currents
+    V[...] = effective_dV_dt_part * kernel - history_component
+    fired = V >= V_th
+    spike_states[...] = fired
+    V[fired] = V_reset
+    return spike_states
+
+@register_kernel("flif_population_update", "numba")
+def flif_population_update_loop(V, history_component, input_currents, kernel, tau_m, bias, V_th, V_reset,
+                                spike_states):
+    for n in range(V.shape[0]):
+        V[n] = ((-V[n] / tau_m) + bias + input_currents[n]) * kernel - history_component[n]
+        spike_states[n] = V[n] >= V_th
+        if spike_states[n]:
+            V[n] = V_reset
+    return spike_states
+
+# --- SpikingLiquidStateMachine.step ---
+# Returns new (neuron_states, fired) arrays and the number fired; refractory_counters is
+# updated in place. "lsm_step" takes the dense N x N W, "lsm_step_sparse" the same W in
+# CSC form (column pointers, row indices, values) and only visits the columns of neurons
+# that fired, so its cost is spikes x fan-out instead of N^2. "lsm_step_batch" steps B
+# independent reservoirs sharing W: (B, N) states, spikes and refractory counters, B inputs,
+# and one (B, N) x (N, N) product; it returns the number fired per reservoir.
+
+def _lsm_integrate_numpy(total_input, neuron_states, refractory_counters, leak_rate, threshold,
+                         resting_potential, refractory_period):
+    # Refractory handling: block input accumulation for refractory neurons
+    refractory_mask = refractory_counters > 0
+    total_input[refractory_mask] = 0
+
+    new_states = ((1 - leak_rate) * neuron_states + total_input).astype(neuron_states.dtype, copy=False)
+    new_fired = new_states > threshold
+    new_states[new_fired] = resting_potential
+
+    refractory_counters[new_fired] = refractory_period
+    refractory_counters[refractory_mask] -= 1
+    return new_states, new_fired, np.count_nonzero(new_fired, axis=-1)
+
+@register_kernel("lsm_step", "numpy")
+def lsm_step_numpy(W, W_in, fired, neuron_states, refractory_counters, input_signal, input_scaling,
+                   leak_rate, threshold, resting_potential, refractory_period):
+    neuron_spikes = fired.astype(neuron_states.dtype)
+    total_input = np.dot(W, neuron_spikes) + W_in * input_signal * input_scaling
+    return _lsm_integrate_numpy(total_input, neuron_states, refractory_counters, leak_rate, threshold,
+                                resting_potential, refractory_period)
+
+@register_kernel("lsm_step_batch", "numpy")
+def lsm_step_batch_numpy(W, W_in, fired, neuron_states, refractory_counters, input_signal, input_scaling,
+                         leak_rate, threshold, resting_potential, refractory_period):
+    neuron_spikes = fired.astype(neuron_states.dtype)
+    total_input = np.dot(neuron_spikes, W.T) + W_in * input_signal[:, None] * input_scaling
+    return _lsm_integrate_numpy(total_input, neuron_states, refractory_counters, leak_rate, threshold,
+                                resting_potential, refractory_period)
+
+@register_kernel("lsm_step", "numba")
+def lsm_step_loop(W, W_in, fired, neuron_states, refractory_counters, input_signal, input_scaling,
+                  leak_rate, threshold, resting_potential, refractory_period):
+    n = neuron_states.shape[0]
+    new_states = np.empty_like(neuron_states)
+    new_fired = np.empty(n, dtype=np.bool_)
+    # Only the columns of neurons that fired last step contribute to the recurrent input
+    active = np.flatnonzero(fired)
+    num_fired = 0
+    for i in range(n):
+        refractory = refractory_counters[i] > 0
+        total_input = 0.0
+        if not refractory:
+            for j in active:
+                total_input += W[i, j]
+            total_input += W_in[i] * input_signal * input_scaling
+        new_states[i] = (1 - leak_rate) * neuron_states[i] + total_input
+        new_fired[i] = new_states[i] > threshold
+        if new_fired[i]:
+            new_states[i] = resting_potential
+            refractory_counters[i] = refractory_period
+            num_fired += 1
+        if refractory:
+            refractory_counters[i] -= 1
+    return new_states, new_fired, num_fired
+
+@register_kernel("lsm_step_batch", "numba")
+def lsm_step_batch_loop(W, W_in, fired, neuron_states, refractory_counters, input_signal, input_scaling,
+                        leak_rate, threshold, resting_potential, refractory_period):
+    batch, n = neuron_states.shape
+    new_states = np.empty_like(neuron_states)
+    new_fired = np.empty((batch, n), dtype=np.bool_)
+    num_fired = np.zeros(batch, dtype=np.int64)
+    for b in range(batch):
+        active = np.flatnonzero(fired[b])
+        for i in range(n):
+            refractory = refractory_counters[b, i] > 0
+            total_input = 0.0
+            if not refractory:
+                for j in active:
+                    total_input += W[i, j]
+                total_input += W_in[i] * input_signal[b] * input_scaling
+            new_states[b, i] = (1 - leak_rate) * neuron_states[b, i] + total_input
+            new_fired[b, i] = new_states[b, i] > threshold
+            if new_fired[b, i]:
+                new_states[b, i] = resting_potential
+                refractory_counters[b, i] = refractory_period
+                num_fired[b] += 1
+            if refractory:
+                refractory_counters[b, i] -= 1
+    return new_states, new_fired, num_fired
+
+@register_kernel("lsm_step_sparse", "numpy")
+def lsm_step_sparse_numpy(W_indptr, W_indices, W_data, W_in, fired, neuron_states, refractory_counters,
+                          input_signal, input_scaling, leak_rate, threshold, resting_potential, refractory_period):
+    active = np.flatnonzero(fired)
+    starts = W_indptr[active]
+    counts = W_indptr[active + 1] - starts
+    # Positions of all nonzeros of the active columns, column after column
+    nonzeros = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+    recurrent = np.bincount(W_indices[nonzeros], weights=W_data[nonzeros], minlength=neuron_states.shape[0])
+    total_input = recurrent.astype(neuron_states.dtype) + W_in * input_signal * input_scaling
+    return _lsm_integrate_numpy(total_input, neuron_states, refractory_counters, leak_rate, threshold,
+                                resting_potential, refractory_period)
+
+@register_kernel("lsm_step_sparse", "numba")
+def lsm_step_sparse_loop(W_indptr, W_indices, W_data, W_in, fired, neuron_states, refractory_counters,
+                         input_signal, input_scaling, leak_rate, threshold, resting_potential, refractory_period):
+    n = neuron_states.shape[0]
+    recurrent = np.zeros(n)
+    for j in np.flatnonzero(fired):
+        for k in range(W_indptr[j], W_indptr[j + 1]):
+            recurrent[W_indices[k]] += W_data[k]
+    new_states = np.empty_like(neuron_states)
+    new_fired = np.empty(n, dtype=np.bool_)
+    num_fired = 0
+    for i in range(n):
+        refractory = refractory_counters[i] > 0
+        total_input = 0.0
+        if not refractory:
+            total_input = recurrent[i] + W_in[i] * input_signal * input_scaling
+        new_states[i] = (1 - leak_rate) * neuron_states[i] + total_input
+        new_fired[i] = new_states[i] > threshold
+        if new_fired[i]:
+            new_states[i] = resting_potential
+            refractory_counters[i] = refractory_period
+            num_fired += 1
+        if refractory:
+            refractory_counters[i] -= 1
+    return new_states, new_fired, num_fired
+
+# --- simulate_rc_ladder time loop (challenge_23) ---
+
+@register_kernel("rc_ladder", "numpy")
+def rc_ladder_numpy(n_steps, dt, Iin_amp, Rs, Cs, C0, Rleak):
+    # Reference loop; the 5-stage update is too small for array ops to pay off per step
+    stages = len(Rs)
+    v_mem = np.zeros(n_steps)
+    v = np.zeros(stages)
+
+    for i in range(n_steps):
+        v_prev = v.copy()
+        vm = v_mem[i-1] if i > 0 else 0.0
+
+        # Update membrane voltage
+        dvm = dt * (Iin_amp - vm/Rleak - (vm - v_prev[0])/Rs[0]) / C0
+        v_mem[i] = vm + dvm
+
+        # Update ladder nodes
+        for j in range(stages):
+            vin = vm if j == 0 else v_prev[j-1]
+            if j < stages - 1:
+                vout = v_prev[j+1]
+                flow_rate = (vin - v_prev[j]) / Rs[j] - (v_prev[j] - vout) / Rs[j+1]
+            else:
+                flow_rate = (vin - v_prev[j]) / Rs[j]
+            v[j] = v_prev[j] + dt * flow_rate / Cs[j]
+
+    return v_mem
+
+register_kernel("rc_ladder", "numba")(rc_ladder_numpy)
+
+# --- Spike edge detection and ISIs (spice_analyzer, challenge_27) ---
+
+@register_kernel("rising_edges", "numpy")
+def rising_edges_numpy(signal, threshold):
+    # Indices i with signal[i-1] < threshold <= signal[i]
+    return np.flatnonzero((signal[:-1] < threshold) & (signal[1:] >= threshold)) + 1
+
+@register_kernel("rising_edges", "numba")
+def rising_edges_loop(signal, threshold):
+    edges = np.empty(len(signal), dtype=np.int64)
+    count = 0
+    for i in range(1, len(signal)):
+        if signal[i-1] < threshold and signal[i] >= threshold:
+            edges[count] = i
+            count += 1
+    return edges[:count]
+
+@register_kernel("isi", "numpy")
+def isi_numpy(spike_times, min_isi):
+    # Inter-spike intervals above min_isi and the midpoints of those intervals
+    isis = spike_times[1:] - spike_times[:-1]
+    mid_times = (spike_times[1:] + spike_times[:-1]) / 2
+    keep = isis > min_isi
+    return isis[keep], mid_times[keep]
+
+@register_kernel("isi", "numba")
+def isi_loop(spike_times, min_isi):
+    n = max(len(spike_times) - 1, 0)
+    isis = np.empty(n)
+    mid_times = np.empty(n)
+    count = 0
+    for i in range(1, len(spike_times)):
+        current_isi = spike_times[i] - spike_times[i-1]
+        if current_isi > min_isi:
+            isis[count] = current_isi
+            mid_times[count] = (spike_times[i] + spike_times[i-1]) / 2
+            count += 1
+    return isis[:count], mid_times[:count]
+
+# --- Equivalence checks ---
+
+def _equivalence_cases(rng):
+    # name -> list of argument builders (fresh arrays per call, kernels work in place)
+    def flif_case(dtype):
+        L = 500
+        buf = np.zeros(2 * L, dtype=dtype)
+        buf[:L] = rng.uniform(-0.1, 0.3, L)
+        buf[L:] = buf[:L]
+        coeffs = np.linspace(-0.75, -1e-4, L).astype(dtype)
+        return lambda: (dtype(0.1), buf.copy(), 0, L, coeffs, 1.5, 0.1**0.75, 20.0, 0.05, 0.3, 0.0)
+
+    def flif_population_case(dtype):
+        size = 64
+        V = rng.uniform(-0.1, 0.3, size).astype(dtype)
+        history_component = rng.uniform(-0.05, 0.05, size)
+        input_currents = rng.uniform(0.0, 3.0, size)
+        return lambda: (V.copy(), history_component, input_currents, 0.1**0.75, 20.0, 0.05, 0.3, 0.0,
+                        np.zeros(size, dtype=int))
+
+    def lsm_case():
+        n = 200
+        W = rng.random((n, n)) * (rng.random((n, n)) < 0.2) * 0.05
+        W_in = rng.random(n)
+        fired = rng.random(n) < 0.2
+        states = rng.random(n) * 0.4
+        counters = rng.integers(0, 3, n)
+        return lambda: (W, W_in, fired.copy(), states.copy(), counters.copy(), 0.7, 0.115, 0.2, 0.5, 0.0, 2)
+
+    def lsm_batch_case():
+        n, batch = 200, 8
+        W = rng.random((n, n)) * (rng.random((n, n)) < 0.2) * 0.05
+        W_in = rng.random(n)
+        fired = rng.random((batch, n)) < 0.2
+        states = rng.random((batch, n)) * 0.4
+        counters = rng.integers(0, 3, (batch, n))
+        inputs = rng.random(batch)
+        return lambda: (W, W_in, fired.copy(), states.copy(), counters.copy(), inputs, 0.115, 0.2, 0.5, 0.0, 2)
+
+    def lsm_sparse_case():
+        dense_args = lsm_case()()
+        W = dense_args[0]
+        cols, rows = np.nonzero(W.T) # column-major order
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(cols, minlength=W.shape[1]))))
+        csc = (indptr, rows.astype(np.int32), W[rows, cols])
+        return lambda: csc + tuple(a.copy() if isinstance(a, np.ndarray) else a for a in dense_args[1:])
+
+    signal = np.sin(np.linspace(0, 60, 5000)) * 5 + rng.normal(0, 0.1, 5000)
+    spike_times = np.sort(rng.uniform(0, 1, 300))
+    return {
+        "flif_update": [flif_case(np.float64), flif_case(np.float32)],
+        "flif_population_update": [flif_population_case(np.float64), flif_population_case(np.float32)],
+        "lsm_step": [lsm_case()],
+        "lsm_step_batch": [lsm_batch_case()],
+        "lsm_step_sparse": [lsm_sparse_case()],
+        "rc_ladder": [lambda: (2000, 1e-5, 2e-6, np.array([1e5, 3e5, 9e5, 2.7e6, 8.1e6]),
+                               np.array([1e-9, 3e-9, 9e-9, 2.7e-8, 8.1e-8]), 1e-9, 500e3)],
+        "rising_edges": [lambda: (signal, 4.0)],
+        "isi": [lambda: (spike_times, 1e-3)],
+    }
+
+def _outputs_match(a, b, rtol, atol):
+    if isinstance(a, tuple):
+        return all(_outputs_match(x, y, rtol, atol) for x, y in zip(a, b))
+    a, b = np.asarray(a), np.asarray(b)
+    return a.shape == b.shape and np.allclose(a, b, rtol=rtol, atol=atol)
+
+def check_kernel_equivalence(rtol=1e-6, atol=1e-9, seed=0):
+    """
+    Runs every registered kernel's backends on the same inputs and compares their
+    outputs and in-place updated arrays against the NumPy reference.
+    Returns {name: {backend: True/False/None}} (None = backend not available).
+    """
+    rng = np.random.default_rng(seed)
+    results = {}
+    for name, cases in _equivalence_cases(rng).items():
+        results[name] = {}
+        for backend in BACKENDS:
+            impl = _compiled(name, backend)
+            if impl is None:
+                results[name][backend] = None
+                continue
+            ok = True
+            for make_args in cases:
+                ref_args, args = make_args(), make_args()
+                ref_out = _kernels[name]["numpy"](*ref_args)
+                out = impl(*args)
+                ok &= _outputs_match(ref_out, out, rtol, atol)
+                ok &= all(_outputs_match(r, a, rtol, atol) for r, a in zip(ref_args, args)
+                          if isinstance(r, np.ndarray))
+            results[name][backend] = bool(ok)
+    return results
+
+if __name__ == "__main__":
+    results = check_kernel_equivalence()
+    for name, by_backend in results.items():
+        status = ", ".join(f"{b}: {'skipped' if ok is None else ('ok' if ok else 'MISMATCH')}" for b, ok in by_backend.items())
+        print(f"{name:22s} {status}")
+    if any(ok is False for by_backend in results.values() for ok in by_backend.values()):
+        raise SystemExit(1)
@@ -1,428 +1,185 @@
+import argparse
+import contextlib
+import time
 import numpy as np
-import random
-from trail import load_santa_fe_trail
 
-# --- Constants and Hyperparameters ---
-# Environment
-GRID_SIZE = 32
-MAX_STEPS_PER_EPISODE = 250
-TOTAL_FOOD_PELLETS_ON_MAP = 89 
-START_POS = (0, 0)  # Assuming top-left, adjust based on map
-START_ORIENTATION = 'EAST' # Example, adjust based on map (0:E, 1:S, 2:W, 3:N)
-
-# SNN Parameters
-FLIF_MEMBRANE_TIME_CONSTANT = 20.0  # ms
-FLIF_THRESHOLD_VOLTAGE = 0.3    # mV (or normalized units)
-FLIF_RESET_VOLTAGE = 0.0    # mV
-FLIF_NEURONS_BIAS = 0.05    # Small bias
-FLIF_FRACTIONAL_ORDER_ALPHA = 0.75
-FLIF_MEMORY_LENGTH = 12500 # full simulation
-
-LIF_MEMBRANE_TIME_CONSTANT = 20.0  # ms
-LIF_THRESHOLD_VOLTAGE = 0.75        # mV
-LIF_RESET_VOLTAGE = 0.0          # mV
-LIF_NEURONS_BIAS = 0.05
-
-DT_NEURON_SIM = 0.1              # ms
-T_ANT_DECISION_WINDOW = 5.0       # ms
-NUM_NEURON_STEPS_PER_ANT_STEP = int(T_ANT_DECISION_WINDOW / DT_NEURON_SIM)
-
-I_ACTIVE_INPUT_CURRENT = 1.5     # Current injected when context is active
-
-# RL Parameters
-LEARNING_RATE_ETA = 0.0001
-DISCOUNT_FACTOR_GAMMA = 0.99
-EXPLORATION_TEMPERATURE_TAU_RL = 1.0 # For softmax
-
-# Surrogate Gradient
-SG_RECT_WIDTH = 0.5             # mV
-
-# Action Mapping
-ACTION_MAP = {0: 'TurnLeft', 1: 'TurnRight', 2: 'MoveForward'}
-ACTION_IDX_MAP = {'TurnLeft':0, 'TurnRight':1, 'MoveForward':2} # For convenience
-
-NUM_EPISODES = 1000 # Example number of training episodes
-
-# --- Helper Functions ---
-def calculate_gl_coefficients(alpha, length):
-    coeffs = np.zeros(length, dtype=np.float64)
-    if length == 0:
-        return coeffs
-    coeffs[0] = -alpha # Matches user's Cython code
-    for j in range(1, length):
-        coeffs[j] = (1.0 - (alpha + 1.0) / (j + 1.0)) * coeffs[j-1] # j+1 to match Cython's j indexing
-    return coeffs
-
-def softmax_stable(logits_array):
-    if not logits_array.size: return np.array([]) # Handle empty array
-    stable_logits = logits_array - np.max(logits_array)
-    exp_logits = np.exp(stable_logits)
-    sum_exp_logits = np.sum(exp_logits)
-    if sum_exp_logits == 0: # Avoid division by zero if all logits are extremely small
-        return np.ones_like(exp_logits) / exp_logits.size
-    return exp_logits / sum_exp_logits
-
-def calculate_discounted_returns(rewards_list, gamma):
-    G = 0.0
-    discounted_returns = np.zeros_like(rewards_list, dtype=float)
-    for t in reversed(range(len(rewards_list))):
-        G = rewards_list[t] + gamma * G
-        discounted_returns[t] = G
-    return discounted_returns
-
-def rectangular_surrogate_gradient(membrane_potential, threshold, width):
-    u = membrane_potential - threshold
-    if abs(u) < width / 2.0:
-        return 1.0 / width
-    return 0.0
-
-def initialize_weights(num_weights):
-    return (np.random.rand(num_weights)) * 0.1 + 0.1
-
-# --- Neuron Classes ---
-class FractionalLIFNeuron:
-    def __init__(self, neuron_id, params):
-        self.neuron_id = neuron_id
-        self.alpha = params.get("alpha", FLIF_FRACTIONAL_ORDER_ALPHA)
-        self.tau_m = params.get("tau_m", FLIF_MEMBRANE_TIME_CONSTANT)
-        self.V_th = params.get("V_th", FLIF_THRESHOLD_VOLTAGE)
-        self.V_reset = params.get("V_reset", FLIF_RESET_VOLTAGE)
-        self.bias = params.get("bias", FLIF_NEURONS_BIAS)
-        self.memory_length = params.get("memory_length", FLIF_MEMORY_LENGTH)
-        
-        self.V = self.V_reset
-        self.voltage_history = np.full(self.memory_length, self.V_reset, dtype=np.float64)
-        self.gl_coefficients = calculate_gl_coefficients(self.alpha, self.memory_length)
-        self.spike_state = 0
-
-    def reset_state(self):
-        self.V = self.V_reset
-        self.voltage_history.fill(self.V_reset)
-        self.spike_state = 0
-
-    def update(self, input_current, dt):
-        self.spike_state = 0
-        
-        history_component = 0.0
-        if self.memory_length > 0:
-            history_component = np.dot(self.gl_coefficients, self.voltage_history)
-
-        kernel = dt**self.alpha
-        
-        # Voltage update based on user's Cython code structure
-        # V_new = (-V_old/τm + bias + I_in) * dt^α - GL_history_sum
-        # Note: In the Cython code, V_old is on the right with positive sign, effectively making it
-        # V[t] = V[t-1] + dt^alpha/tau_m * (-V[t-1] + bias*tau_m + I_in*tau_m) - history*dt^alpha (?)
-        # Let's use the one from Cython directly adapted:
-        # hidden_layer_voltages[i] = (-hidden_layer_voltages[i] / membrane_time_constant + neurons_bias + cartpole_inputs[i]) * kernel - hidden_history_component[i]
-        # This assumes V on LHS is V[t] and V on RHS is V[t-dt] before THIS update.
-        
-        # Let's re-interpret for a single step. V is current V (V_old for this step)
-        # The term (-self.V / self.tau_m + self.bias + input_current) is like dV/dt if alpha=1 and no history
-        effective_dV_dt_part = (-self.V / self.tau_m) + self.bias + input_current
-        
-        self.V = effective_dV_dt_part * kernel - history_component
-        # This formulation needs careful check against discrete fractional derivative definitions.
-        # A common form is: V[k] = sum_{j=0}^{mem-1} (-1)^j * C(alpha,j) * I[k-j]*h^alpha - (1/tau) * sum_{j=0}^{mem-1} (-1)^j*C(alpha,j)*V[k-j]*h^alpha
-        # The user's code seems to be:
-        # V_new = (dV_traditional_terms) * dt^alpha - sum(gl_coeffs * V_history)
-        # This implies gl_coeffs are for the fractional derivative of V itself.
-
-        if self.V >= self.V_th:
-            self.spike_state = 1
-            self.V = self.V_reset
-        
-        # Update voltage_history (roll and add new V)
-        if self.memory_length > 0:
-            self.voltage_history = np.roll(self.voltage_history, 1)
-            self.voltage_history[0] = self.V # Store post-reset or current subthreshold V
-
-    def get_spike_state(self):
-        return self.spike_state
-
-    def get_voltage(self):
-        return self.V
-
-class StandardLIFNeuron:
-    def __init__(self, neuron_id, params):
-        self.neuron_id = neuron_id
-        self.tau_m = params.get("tau_m", LIF_MEMBRANE_TIME_CONSTANT)
-        self.V_th = params.get("V_th", LIF_THRESHOLD_VOLTAGE)
-        self.V_reset = params.get("V_reset", LIF_RESET_VOLTAGE)
-        self.bias_current = params.get("bias_current", LIF_NEURONS_BIAS) # Assuming bias is a current
-        
-        self.V = self.V_reset
-        self.spike_state = 0
-
-    def reset_state(self):
-        self.V = self.V_reset
-        self.spike_state = 0
-
-    def update(self, input_current, dt):
-        self.spike_state = 0
-        # dV/dt = (-V + V_rest + bias_current*R_m + input_current*R_m) / tau_m
-        # Assuming V_rest = 0 and R_m is absorbed into currents or tau_m definition.
-        # More simply: dV/dt = (-V/tau_m) + (bias_current + input_current)/C_m
-        # If tau_m = R_m * C_m, then dV/dt = (-V + R_m*(bias_current + input_current))/tau_m
-        # Let's assume bias is a current and input_current is also a current.
-        # dV = ((-self.V / self.tau_m) + self.bias_current + input_current) * dt 
-        # A common discrete form:
-        alpha_decay = np.exp(-dt / self.tau_m)
-        self.V = self.V * alpha_decay + (self.bias_current + input_current) * (1 - alpha_decay) * self.tau_m # if tau_m is R*C and I is current
-        # Simpler Euler:
-        # dV_dt = (-self.V + self.bias_current*self.tau_m + input_current*self.tau_m) / self.tau_m # if bias is a voltage-like term
-        dV_dt = (-self.V / self.tau_m) + self.bias_current + input_current # if bias and input_current are currents scaled by 1/C
-        self.V += dV_dt * dt
-
-
-        if self.V >= self.V_th:
-            self.spike_state = 1
-            self.V = self.V_reset
-            
-    def get_spike_state(self):
-        return self.spike_state
-
-    def get_voltage(self):
-        return self.V
-
-# --- Environment Class ---
-class SantaFeEnvironment:
-    def __init__(self, map_filepath, start_pos, start_orientation_str):
-        self.trail_map_original = self._load_map(map_filepath)
-        self.trail_map_current = np.copy(self.trail_map_original)
-        self.start_pos = start_pos
-        self.start_orientation_str = start_orientation_str # 'EAST', 'SOUTH', 'WEST', 'NORTH'
-        self.orientations = ['EAST', 'SOUTH', 'WEST', 'NORTH']
-        self.orientation_deltas = { # dx, dy
-            'EAST': (1, 0), 'SOUTH': (0, 1), 'WEST': (-1, 0), 'NORTH': (0, -1)
-        }
-        self.ant_pos = None
-        self.ant_orientation_idx = None # Index in self.orientations
-        self.food_eaten_in_episode = 0
-        self.grid_height, self.grid_width = self.trail_map_original.shape
-
-    def _load_map(self, filepath):
-        # Placeholder: Load your Koza trail map here
-        # Example: return np.loadtxt(filepath, dtype=int)
-        # For now, a simple dummy map for structure
-        print(f"Placeholder: Load Koza trail map from {filepath}")
-        # Let's create a simple 5x5 map with a small trail for testing structure
-        # Replace this with actual Koza map loading
-        simple_map = np.zeros((5,5), dtype=int)
-        simple_map[0,1] = 1; simple_map[0,2] = 1; simple_map[0,3] = 1;
-        return load_santa_fe_trail()
-
-    def reset_ant_and_trail(self):
-        self.trail_map_current = np.copy(self.trail_map_original)
-        self.ant_pos = list(self.start_pos)
-        self.ant_orientation_idx = self.orientations.index(self.start_orientation_str)
-        self.food_eaten_in_episode = 0
-        return tuple(self.ant_pos), self.orientations[self.ant_orientation_idx], np.sum(self.trail_map_current)
-
-    def get_food_ahead(self):
-        dx, dy = self.orientation_deltas[self.orientations[self.ant_orientation_idx]]
-        front_x, front_y = self.ant_pos[0] + dx, self.ant_pos[1] + dy
-        
-        if 0 <= front_x < self.grid_width and 0 <= front_y < self.grid_height:
-            return self.trail_map_current[front_y, front_x] == 1 # Assuming map is (y,x)
-        return False # Off grid means no food
-
-    def step(self, action_idx): # action_idx: 0:L, 1:R, 2:Fwd
-        action_str = ACTION_MAP[action_idx]
-        reward = -0.01 # Default step cost
-        episode_done_env = False
-        food_consumed_flag = False
-        prev_pos = list(self.ant_pos)
-
-        if action_str == 'TurnLeft':
-            self.ant_orientation_idx = (self.ant_orientation_idx - 1 + 4) % 4
-        elif action_str == 'TurnRight':
-            self.ant_orientation_idx = (self.ant_orientation_idx + 1) % 4
-        elif action_str == 'MoveForward':
-            dx, dy = self.orientation_deltas[self.orientations[self.ant_orientation_idx]]
-            next_x, next_y = self.ant_pos[0] + dx, self.ant_pos[1] + dy
-
-            if 0 <= next_x < self.grid_width and 0 <= next_y < self.grid_height:
-                self.ant_pos = [next_x, next_y]
-                if self.trail_map_current[next_y, next_x] == 1:
-                    reward = 1.0 # Food reward
-                    self.trail_map_current[next_y, next_x] = 0 # Eat food
-                    self.food_eaten_in_episode += 1
-                    food_consumed_flag = True
-                    if self.food_eaten_in_episode == TOTAL_FOOD_PELLETS_ON_MAP: # Use actual total from loaded map
-                        episode_done_env = True
-            else:
-                # Bumped boundary, stays in place, reward is already -0.01 (step_cost)
-                pass
-        
-        return tuple(self.ant_pos), self.orientations[self.ant_orientation_idx], reward, episode_done_env, food_consumed_flag
-
-# --- MAIN SIMULATION AND TRAINING LOOP ---
-
-# Initialize SNN
-flif_neuron_params = {
-    "alpha": FLIF_FRACTIONAL_ORDER_ALPHA, "tau_m": FLIF_MEMBRANE_TIME_CONSTANT,
-    "V_th": FLIF_THRESHOLD_VOLTAGE, "V_reset": FLIF_RESET_VOLTAGE,
-    "bias": FLIF_NEURONS_BIAS, "memory_length": FLIF_MEMORY_LENGTH
-}
-fLIF_food = FractionalLIFNeuron("food_ctx", flif_neuron_params)
-fLIF_nofood = FractionalLIFNeuron("nofood_ctx", flif_neuron_params)
-
-lif_leaf_params = {
-    "tau_m": LIF_MEMBRANE_TIME_CONSTANT, "V_th": LIF_THRESHOLD_VOLTAGE,
-    "V_reset": LIF_RESET_VOLTAGE, "bias_current": LIF_NEURONS_BIAS # Assuming bias is current
-}
-action_leaf_neurons_food_context = [FractionalLIFNeuron(f"food_leaf_{i}", flif_neuron_params) for i in range(3)]
-action_leaf_neurons_nofood_context = [FractionalLIFNeuron(f"nofood_leaf_{i}", flif_neuron_params) for i in range(3)]
-
-W_food_to_action = initialize_weights(3)
-W_nofood_to_action = initialize_weights(3)
-
-# Initialize Environment
-environment = SantaFeEnvironment("koza_trail.txt", START_POS, START_ORIENTATION) 
-
-print(f"Starting training for {NUM_EPISODES} episodes...")
-avg_food_eaten = 0
-for episode_i in range(NUM_EPISODES):
-    ant_pos, ant_orient_str, _ = environment.reset_ant_and_trail()
-    
-    fLIF_food.reset_state()
-    fLIF_nofood.reset_state()
-    for leaf_neuron in action_leaf_neurons_food_context + action_leaf_neurons_nofood_context:
-        leaf_neuron.reset_state()
-
-    episode_trajectory = []
-    total_episode_reward = 0.0
-    food_eaten_this_episode = 0
-
-    for t_ant_step in range(MAX_STEPS_PER_EPISODE):
-        is_food_ahead = environment.get_food_ahead()
-
-        active_fLIF = fLIF_food if is_food_ahead else fLIF_nofood
-        inactive_fLIF = fLIF_nofood if is_food_ahead else fLIF_food
-        
-        current_input_to_active_fLIF = I_ACTIVE_INPUT_CURRENT
-        current_input_to_inactive_fLIF = 0.0
-        
-        active_leaf_neurons = action_leaf_neurons_food_context if is_food_ahead else action_leaf_neurons_nofood_context
-        active_weights = W_food_to_action if is_food_ahead else W_nofood_to_action
-
-        fLIF_spike_trace_this_T_ant = np.zeros(NUM_NEURON_STEPS_PER_ANT_STEP, dtype=int)
-        leaf_potentials_this_T_ant = [np.zeros(NUM_NEURON_STEPS_PER_ANT_STEP) for _ in range(3)]
-        current_T_ant_leaf_spike_counts = np.zeros(3, dtype=int)
-
-        for t_neuron_idx in range(NUM_NEURON_STEPS_PER_ANT_STEP):
-            active_fLIF.update(current_input_to_active_fLIF, DT_NEURON_SIM)
-            fLIF_spike_trace_this_T_ant[t_neuron_idx] = active_fLIF.get_spike_state()
-
-            inactive_fLIF.update(current_input_to_inactive_fLIF, DT_NEURON_SIM)
-            
-            for i_leaf in range(3):
-                leaf_neuron = active_leaf_neurons[i_leaf]
-                weight = active_weights[i_leaf]
-                synaptic_current_to_leaf = fLIF_spike_trace_this_T_ant[t_neuron_idx] * weight
-                
-                leaf_neuron.update(synaptic_current_to_leaf, DT_NEURON_SIM)
-                if leaf_neuron.get_spike_state() == 1:
-                    current_T_ant_leaf_spike_counts[i_leaf] += 1
-                leaf_potentials_this_T_ant[i_leaf][t_neuron_idx] = leaf_neuron.get_voltage()
-        
-        action_probabilities = softmax_stable(current_T_ant_leaf_spike_counts / EXPLORATION_TEMPERATURE_TAU_RL)
-        
-        # Handle case where all spike counts are zero -> uniform probabilities
-        if np.sum(current_T_ant_leaf_spike_counts) == 0 :
-             action_probabilities = np.ones(3) / 3.0
-
-        chosen_action_idx = np.random.choice(3, p=action_probabilities)
-        
-        next_ant_pos, next_ant_orient_str, reward, episode_done_env, food_consumed_flag = \
-            environment.step(chosen_action_idx)
-        
-        total_episode_reward += reward
-        if food_consumed_flag:
-             food_eaten_this_episode +=1
-
-        episode_trajectory.append({
-            "is_food_ahead_context": is_food_ahead,
-            "fLIF_spike_trace": np.copy(fLIF_spike_trace_this_T_ant),
-            "leaf_potentials_traces": [np.copy(p_trace) for p_trace in leaf_potentials_this_T_ant],
-            "chosen_action_idx": chosen_action_idx,
-            "action_probabilities": np.copy(action_probabilities),
-            "reward": reward
-        })
-
-        ant_pos, ant_orient_str = next_ant_pos, next_ant_orient_str # Update ant's state string for orientation
-        if episode_done_env or food_eaten_this_episode == TOTAL_FOOD_PELLETS_ON_MAP:
-            break
-            
-    rewards_for_G_t = [t["reward"] for t in episode_trajectory]
-    discounted_returns_G_t = calculate_discounted_returns(rewards_for_G_t, DISCOUNT_FACTOR_GAMMA)
-    if len(discounted_returns_G_t) > 1:
-        mean_G_t = np.mean(discounted_returns_G_t)
-        std_G_t = np.std(discounted_returns_G_t)
-        if std_G_t > 1e-8: # Add a small epsilon to prevent division by zero if all G_t are the same
-            normalized_G_t_values = (discounted_returns_G_t - mean_G_t) / std_G_t
+from alloc_profiler import AllocationProfiler
+from gl_coefficients import memory_truncation_diagnostics
+from phase_timer import PhaseTimer, instrument_trainer
+from santa_fe_ant import (AntTrainer, FractionalLIFNeuron, train_batched, initialize_weights,
+                          compressed_memory_report, precision_validation_report, flif_neuron_params,
+                          lif_leaf_params, resolve_memory_length, NUM_EPISODES, NUM_PARALLEL_ANTS,
+                          FLIF_MEMORY_LENGTH, FLIF_MAX_MEMORY_LENGTH, I_ACTIVE_INPUT_CURRENT, NUM_NEURON_STEPS_PER_ANT_STEP,
+                          MAX_STEPS_PER_EPISODE, DT_NEURON_SIM, EARLY_DECISION, DECISION_CONFIDENCE)
+
+# Command line entry point for training the Santa Fe ant. The models live in
+# santa_fe_ant.py; this file only parses flags, runs the diagnostics and the training
+# and prints the reports.
+#     python main.py --episodes 200 --memory-length 2000 --timing
+
+# FLIF neurons updated per neuron sub-step: both context neurons and the active context's 3 leaves
+NEURON_UPDATES_PER_SUB_STEP = 5
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Santa Fe ant with fractional LIF neurons.")
+    parser.add_argument("--episodes", type=int, default=NUM_EPISODES)
+    parser.add_argument("--memory-length", type=int, default=None, help=f"GL history length (default {FLIF_MEMORY_LENGTH})")
+    parser.add_argument("--memory-tol", type=float, default=None, help="pick the memory length from this truncated GL mass instead")
+    parser.add_argument("--memory-mode", choices=("exact", "compressed"), default=None)
+    parser.add_argument("--backend", choices=("numpy", "numba"), default=None,
+                        help="kernel backend of the neuron updates in training and the diagnostics (numba falls back to numpy if missing)")
+    parser.add_argument("--parallel-ants", type=int, default=NUM_PARALLEL_ANTS)
+    parser.add_argument("--early-decision", action="store_true", default=EARLY_DECISION,
+                        help="end each decision window once the leading action can no longer be overtaken")
+    parser.add_argument("--decision-confidence", type=float, default=DECISION_CONFIDENCE,
+                        help="with --early-decision, also end it once the top action probability reaches this")
+    parser.add_argument("--seed", type=int, default=None, help="use a seeded Generator instead of the global np.random state")
+    parser.add_argument("--timing", action="store_true", help="print a timing report after training")
+    parser.add_argument("--phases", action="store_true",
+                        help="also time the gl_dot, history_update, leaf_update, env_step and policy_update phases")
+    parser.add_argument("--phases-out", default=None, help="write the phase summary to this .json or .csv file (implies --phases)")
+    parser.add_argument("--memory-profile", action="store_true",
+                        help="profile allocations (tracemalloc) of setup, the first episode and the rest of training")
+    parser.add_argument("--memory-profile-out", default=None, help="write the allocation profile to this JSON file (implies --memory-profile)")
+    parser.add_argument("--quiet", action="store_true", help="no per-window progress lines")
+    args = parser.parse_args(argv)
+    if args.early_decision and args.parallel_ants > 1:
+        parser.error("--early-decision is only supported for single-ant training (--parallel-ants 1)")
+    args.phases = args.phases or args.phases_out is not None
+    args.memory_profile = args.memory_profile or args.memory_profile_out is not None
+    if args.phases and args.parallel_ants > 1:
+        parser.error("--phases is only supported for single-ant training (--parallel-ants 1)")
+    return args
+
+def build_flif_params(args):
+    params = dict(flif_neuron_params)
+    overrides = {"memory_length": args.memory_length, "memory_tol": args.memory_tol,
+                 "memory_mode": args.memory_mode, "backend": args.backend}
+    params.update({key: value for key, value in overrides.items() if value is not None})
+    return params
+
+def run_diagnostics(params):
+    # One active-context window per ant step for a full episode, alternating with silence
+    report_inputs = np.tile(np.repeat([I_ACTIVE_INPUT_CURRENT, 0.0], NUM_NEURON_STEPS_PER_ANT_STEP), MAX_STEPS_PER_EPISODE // 2)
+    if np.dtype(params["dtype"]) != np.float64:
+        report = precision_validation_report(FractionalLIFNeuron, params, report_inputs, DT_NEURON_SIM,
+                                             params["dtype"], params["accumulate_dtype"])
+        print(f"Precision check ({report['dtype']} storage, {report['accumulate_dtype']} accumulation) vs float64: "
+              f"spikes {report['reference_spikes']}/{report['reduced_spikes']}, "
+              f"max spike-time shift {report['max_spike_time_shift_ms']:.2f} ms, "
+              f"max |dV| {report['max_voltage_deviation']:.2e}")
+    if params["memory_tol"] is not None:
+        diagnostics = memory_truncation_diagnostics(params["alpha"], params["memory_tol"], FLIF_MEMORY_LENGTH,
+                                                    FLIF_MAX_MEMORY_LENGTH)
+        print(f"GL memory from tolerance {params['memory_tol']:g}: length {diagnostics['memory_length']} "
+              f"(truncated mass <= {diagnostics['truncated_mass_bound']:.2e}, "
+              f"vs {diagnostics['reference_truncated_mass']:.2e} at the fixed {FLIF_MEMORY_LENGTH}), "
+              f"expected speedup {diagnostics['expected_speedup']:.1f}x")
+        if diagnostics["exceeds_reference"]:
+            print(f"  Warning: the tolerance needs length {diagnostics['required_length']}, more than the fixed "
+                  f"{FLIF_MEMORY_LENGTH}; it is not worth using"
+                  + ("" if diagnostics["tolerance_met"] else
+                     f" (clamped to {diagnostics['memory_length']}, where it is not met)"))
+    if params["memory_mode"] == "compressed":
+        report = compressed_memory_report(params, report_inputs, DT_NEURON_SIM)
+        print(f"Compressed GL memory: {report['num_modes']} modes (kernel L1 error {report['kernel_l1_error']:.2e}), "
+              f"max |V_exact - V_compressed| = {report['max_voltage_deviation']:.3e}, "
+              f"spikes exact/compressed = {report['exact_spikes']}/{report['compressed_spikes']}, "
+              f"floats per neuron {report['floats_per_neuron_exact']} -> {report['floats_per_neuron_compressed']}")
+
+def print_phase_report(timer, num_ant_steps, path=None):
+    print("\n--- Phase Timing (per call; gl_dot/history_update are one call per population, nested in leaf_update) ---")
+    print(timer.format_table())
+    summary = timer.summary()
+    if num_ant_steps:
+        for phase in timer.phases:
+            print(f"  {phase}: {summary[phase]['total_s'] / num_ant_steps * 1e6:.2f} µs per ant step")
+    if path is not None:
+        if path.endswith(".csv"):
+            timer.to_csv(path)
         else:
-            normalized_G_t_values = discounted_returns_G_t - mean_G_t # Just center if std is tiny
-    elif len(discounted_returns_G_t) == 1:
-        normalized_G_t_values = discounted_returns_G_t # Or set to 0 if only one step, as G_0 - mean(G_0) = 0
-                                                      
-    else: # No transitions
-        normalized_G_t_values = np.array([])
-
-    delta_W_food_to_action = np.zeros(3)
-    delta_W_nofood_to_action = np.zeros(3)
-    for t_idx, transition in enumerate(episode_trajectory):
-        G_t = discounted_returns_G_t[t_idx]
-        if normalized_G_t_values.size > 0: # Ensure trajectory was not empty
-            G_t_to_use = normalized_G_t_values[t_idx] 
-        else: # Should not happen if episode_trajectory has items
-            G_t_to_use = 0  
-        active_weights_grad_delta_ref = delta_W_food_to_action if transition["is_food_ahead_context"] else delta_W_nofood_to_action
-        # Determine leaf params based on context (assuming they might differ, though here they are same)
-        active_leaf_neuron_params = lif_leaf_params 
-
-        for k_action_idx in range(3): # For each of the 3 active weights
-            # Approx dN_k / dw_k 
-            # This is where the surrogate gradient for the leaf neuron and presynaptic activity are used
-            dNk_dwk_approx = 0.0
-            fLIF_spikes_for_grad = transition["fLIF_spike_trace"]
-            leaf_k_potentials_for_grad = transition["leaf_potentials_traces"][k_action_idx]
-            
-            for t_prime_idx in range(len(fLIF_spikes_for_grad)):
-                sg_val = rectangular_surrogate_gradient(
-                    leaf_k_potentials_for_grad[t_prime_idx],
-                    active_leaf_neuron_params["V_th"], # Using V_th from params dict
-                    SG_RECT_WIDTH
-                )
-                if sg_val > 0: # If leaf neuron was "sensitive"
-                    dNk_dwk_approx += fLIF_spikes_for_grad[t_prime_idx] # Add presynaptic spike
-            
-            indicator = 1.0 if k_action_idx == transition["chosen_action_idx"] else 0.0
-            prob_ak = transition["action_probabilities"][k_action_idx]
-            
-            grad_log_pi_component = (indicator - prob_ak) * \
-                                    (1.0 / EXPLORATION_TEMPERATURE_TAU_RL) * dNk_dwk_approx
-            
-            active_weights_grad_delta_ref[k_action_idx] += G_t_to_use * grad_log_pi_component
-   
-    max_grad_abs_val = 50.0  # **Tune this value carefully!** Start with something like 1.0 or 5.0.
-
-    np.clip(delta_W_food_to_action, -max_grad_abs_val, max_grad_abs_val, out=delta_W_food_to_action)
-    np.clip(delta_W_nofood_to_action, -max_grad_abs_val, max_grad_abs_val, out=delta_W_nofood_to_action)
-
-    W_food_to_action += LEARNING_RATE_ETA * delta_W_food_to_action
-    W_nofood_to_action += LEARNING_RATE_ETA * delta_W_nofood_to_action
-
-    window = 10
-    if (episode_i+1) % window == 0: 
-        avg_food_eaten += food_eaten_this_episode
-        avg_food_eaten /= window
-        print(f"Episode {episode_i+1}: Steps={t_ant_step+1}, Average Food Eaten={avg_food_eaten}, Total Reward={total_episode_reward:.2f}, "
-          f"W_food=[{W_food_to_action[0]:.3f}, {W_food_to_action[1]:.3f}, {W_food_to_action[2]:.3f}], "
-          f"W_nofood=[{W_nofood_to_action[0]:.3f}, {W_nofood_to_action[1]:.3f}, {W_nofood_to_action[2]:.3f}]")
-        avg_food_eaten = 0
+            timer.to_json(path, num_ant_steps=num_ant_steps)
+        print(f"Phase summary written to {path}")
+
+def print_timing_report(elapsed, num_episodes, num_ant_steps, memory_length, mean_window_steps=NUM_NEURON_STEPS_PER_ANT_STEP):
+    print("\n--- Python Emulation Timing Report ---")
+    print(f"Total overall training duration: {elapsed:.4f} seconds ({num_episodes / elapsed:.2f} episodes/s)")
+    if num_ant_steps is None:
+        return # batched training does not count steps per ant
+    if num_ant_steps == 0:
+        print("No ant steps processed. Check MAX_STEPS_PER_EPISODE or the number of episodes.")
+        return
+    num_neuron_updates_total = num_ant_steps * mean_window_steps * NEURON_UPDATES_PER_SUB_STEP
+    print(f"Total Ant Steps Processed: {num_ant_steps}")
+    print(f"Average Time per Ant Step (neuron updates, action choice, environment): {elapsed / num_ant_steps * 1e6:.2f} µs")
+    print(f"  ({NEURON_UPDATES_PER_SUB_STEP} FLIF neurons, each updated {mean_window_steps:.1f} times on average, "
+          f"GL memory length {memory_length})")
+    if mean_window_steps < NUM_NEURON_STEPS_PER_ANT_STEP:
+        print(f"Average Decision Window: {mean_window_steps:.2f} of {NUM_NEURON_STEPS_PER_ANT_STEP} sub-steps "
+              f"({mean_window_steps * DT_NEURON_SIM:.2f} ms simulated per decision)")
+    print(f"Average Time per FLIF Neuron Update (upper bound, includes the policy update): "
+          f"{elapsed / num_neuron_updates_total * 1e6:.3f} µs")
+
+    print("\n--- Hardware vs. Emulation Speed Comparison ---")
+    print("   Total Hardware Decision Time (per Ant Step) = T_compute_device_us + T_comm_us")
+    print("   Speedup Factor = (Average Python Time per Ant Step) / (Total Hardware Decision Time)")
+    print("T_compute_device_us: time for the 8-neuron analog network to make one decision (from SPICE, e.g. 50-500 µs).")
+    print("T_comm_us: one round trip between the controller and the analog device (e.g. 50-500 µs).")
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = build_flif_params(args)
+    rng = None if args.seed is None else np.random.default_rng(args.seed)
+    run_diagnostics(params)
+
+    # Without --memory-profile every phase() is a no-op context
+    profiler = AllocationProfiler() if args.memory_profile else None
+    phase = profiler.phase if profiler is not None else lambda name, steps=None: contextlib.nullcontext({})
+
+    start = time.perf_counter()
+    if args.parallel_ants > 1:
+        W_food_to_action = initialize_weights(3, rng)
+        W_nofood_to_action = initialize_weights(3, rng)
+        print(f"Starting batched training for {args.episodes} episodes, {args.parallel_ants} ants in lock-step...")
+        with phase("training"):
+            food_eaten_per_batch = train_batched(args.parallel_ants, args.episodes, params, lif_leaf_params["V_th"],
+                                                 W_food_to_action, W_nofood_to_action, rng=rng, verbose=not args.quiet)
+        num_episodes, num_ant_steps = food_eaten_per_batch.size, None
+        mean_window_steps = NUM_NEURON_STEPS_PER_ANT_STEP
     else:
-        avg_food_eaten += food_eaten_this_episode
+        with phase("setup"):
+            trainer = AntTrainer(params, leaf_V_th=lif_leaf_params["V_th"], early_decision=args.early_decision,
+                                 decision_confidence=args.decision_confidence, rng=rng)
+        timer = instrument_trainer(trainer, PhaseTimer()) if args.phases else None
+        print(f"Starting training for {args.episodes} episodes...")
+        if profiler is not None and args.episodes > 1:
+            # The first episode allocates the lazily built state; the rest should be allocation-free per step
+            with phase("first_episode") as record:
+                trainer.train(1, verbose=not args.quiet)
+                record["steps"] = trainer.history["steps"][-1]
+            with phase("training") as record:
+                trainer.train(args.episodes - 1, verbose=not args.quiet)
+                record["steps"] = int(np.sum(trainer.history["steps"][1:]))
+            history = trainer.history
+        else:
+            history = trainer.train(args.episodes, verbose=not args.quiet)
+        num_episodes, num_ant_steps = len(history["steps"]), int(np.sum(history["steps"]))
+        # Step-weighted mean of the per-episode window lengths
+        mean_window_steps = float(np.average(history["window_steps"], weights=history["steps"])) if num_ant_steps else 0.0
+    elapsed = time.perf_counter() - start
+    print("Training finished.")
+
+    if args.timing:
+        print_timing_report(elapsed, num_episodes, num_ant_steps, resolve_memory_length(params, params["alpha"]),
+                            mean_window_steps)
+    if args.phases:
+        print_phase_report(timer, num_ant_steps, args.phases_out)
+    if profiler is not None:
+        print("\n" + profiler.format_report())
+        if args.memory_profile_out is not None:
+            profiler.to_json(args.memory_profile_out, episodes=num_episodes, memory_length=resolve_memory_length(params, params["alpha"]))
+            print(f"Allocation profile written to {args.memory_profile_out}")
 
-print("Training finished.")
+# --- MAIN SIMULATION AND TRAINING LOOP ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from phase_timer import PhaseTimer
+from santa_fe_ant import FractionalLIFPopulation, flif_neuron_params, I_ACTIVE_INPUT_CURRENT, DT_NEURON_SIM
+
+# Cost of the fractional (GL) memory versus history length.
+# "fixed" mode sweeps memory_length over several orders of magnitude and times the two
+# memory phases of FractionalLIFPopulation.step (gl_dot and history_update) per update.
+# "growing" mode uses the full-memory GL sum, whose window grows by one step per update
+# (no truncation), and times every update against the current history length.
+# Both fit time ~ a * length**b on the large lengths and write a table and a log-log plot.
+#     python memory_scaling_benchmark.py --max-length 1e6 --growing-steps 50000
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+MEMORY_PHASES = ("gl_dot", "history_update")
+
+class GrowingHistoryPopulation(FractionalLIFPopulation):
+    # Full-memory GL: update t sums over all t past voltages instead of a fixed window
+    def __init__(self, size, params, max_steps):
+        super().__init__(size, {**params, "memory_length": max_steps, "memory_tol": None, "memory_mode": "exact"})
+        self.history_length = 0
+
+    def reset_state(self):
+        super().reset_state()
+        self.history_length = 0
+
+    def _history_sum(self):
+        n = self.history_length
+        window = self._history_buffer[self._history_head:self._history_head + n]
+        np.dot(self.gl_coefficients[:n], window, out=self._history_component)
+        return self._history_component
+
+    def _push_history(self):
+        super()._push_history()
+        self.history_length = min(self.history_length + 1, self.memory_length)
+
+def fit_scaling_exponent(lengths, times, min_length=1):
+    # Least-squares fit of log(time) = log(a) + b*log(length) over lengths >= min_length; returns (b, a)
+    lengths, times = np.asarray(lengths, dtype=float), np.asarray(times, dtype=float)
+    keep = (lengths >= min_length) & (times > 0)
+    if np.count_nonzero(keep) < 2:
+        return np.nan, np.nan
+    exponent, log_prefactor = np.polyfit(np.log(lengths[keep]), np.log(times[keep]), 1)
+    return float(exponent), float(np.exp(log_prefactor))
+
+def _timed_population(population, capacity):
+    timer = PhaseTimer(MEMORY_PHASES, capacity=capacity)
+    timer.wrap(population, "_history_sum", "gl_dot")
+    timer.wrap(population, "_push_history", "history_update")
+    return timer
+
+def fixed_memory_sweep(lengths, population_size=5, steps=300, warmup=20, params=flif_neuron_params):
+    # One row per memory length: median µs per population update of each memory phase
+    input_currents = np.full(population_size, I_ACTIVE_INPUT_CURRENT)
+    rows = []
+    for length in lengths:
+        population = FractionalLIFPopulation(population_size, {**params, "memory_length": int(length),
+                                                               "memory_tol": None, "memory_mode": "exact"})
+        timer = _timed_population(population, steps)
+        for _ in range(warmup):
+            population.step(input_currents, DT_NEURON_SIM)
+        timer.reset()
+        for _ in range(steps):
+            population.step(input_currents, DT_NEURON_SIM)
+        summary = timer.summary()
+        rows.append({"mode": "fixed", "memory_length": int(length),
+                     **{f"{phase}_us": summary[phase]["p50_us"] for phase in MEMORY_PHASES}})
+    return pd.DataFrame(rows)
+
+def growing_memory_run(num_steps, population_size=5, num_bins=40, params=flif_neuron_params):
+    # Times every update of a full-memory run and reports the median per log-spaced bin of history length
+    population = GrowingHistoryPopulation(population_size, params, num_steps)
+    timer = _timed_population(population, num_steps)
+    input_currents = np.full(population_size, I_ACTIVE_INPUT_CURRENT)
+    for _ in range(num_steps):
+        population.step(input_currents, DT_NEURON_SIM)
+
+    # Update t sums over a history of t voltages, so sample t is the cost at history length t
+    samples = {phase: timer.samples(phase) / 1e3 for phase in MEMORY_PHASES}
+    edges = np.unique(np.geomspace(1, num_steps, num_bins + 1).astype(int))
+    rows = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        rows.append({"mode": "growing", "memory_length": int(np.sqrt(lo * hi)),
+                     **{f"{phase}_us": float(np.median(samples[phase][lo:hi])) for phase in MEMORY_PHASES}})
+    table = pd.DataFrame(rows)
+    table.attrs["total_s"] = {phase: float(samples[phase].sum() / 1e6) for phase in MEMORY_PHASES}
+    return table
+
+def scaling_fits(table, min_length):
+    fits = []
+    for mode, rows in table.groupby("mode", sort=False):
+        for phase in MEMORY_PHASES:
+            exponent, prefactor = fit_scaling_exponent(rows["memory_length"], rows[f"{phase}_us"], min_length)
+            fits.append({"mode": mode, "phase": phase, "exponent": exponent, "prefactor_us": prefactor,
+                         "fit_min_length": min_length})
+    return pd.DataFrame(fits)
+
+def plot_scaling(table, fits, path):
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 6))
+    markers = {"fixed": "o", "growing": "s"}
+    for (mode, phase), fit in fits.set_index(["mode", "phase"]).iterrows():
+        rows = table[table["mode"] == mode]
+        line, = plt.plot(rows["memory_length"], rows[f"{phase}_us"], markers[mode], label=f"{mode} {phase}")
+        if np.isfinite(fit["exponent"]):
+            lengths = rows["memory_length"][rows["memory_length"] >= fit["fit_min_length"]]
+            plt.plot(lengths, fit["prefactor_us"] * lengths.astype(float)**fit["exponent"], "-", color=line.get_color(),
+                     label=f"  fit: length^{fit['exponent']:.2f}")
+    plt.xscale("log")
+    plt.yscale("log")
+    plt.xlabel("GL history length (steps)")
+    plt.ylabel("Median time per population update (µs)")
+    plt.title("Fractional memory cost vs. history length")
+    plt.grid(True, which="both", alpha=0.3)
+    plt.legend(fontsize=8)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how the GL memory cost scales with history length.")
+    parser.add_argument("--min-length", type=float, default=10)
+    parser.add_argument("--max-length", type=float, default=1e6)
+    parser.add_argument("--points-per-decade", type=int, default=2)
+    parser.add_argument("--steps", type=int, default=300, help="timed updates per fixed memory length")
+    parser.add_argument("--growing-steps", type=int, default=50000, help="updates of the growing-history run (0 to skip)")
+    parser.add_argument("--population-size", type=int, default=5)
+    parser.add_argument("--fit-min-length", type=float, default=1000, help="fit the exponent on lengths >= this")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--no-plot", action="store_true")
+    args = parser.parse_args()
+
+    decades = np.log10(args.max_length) - np.log10(args.min_length)
+    lengths = np.unique(np.geomspace(args.min_length, args.max_length,
+                                     int(round(decades * args.points_per_decade)) + 1).round().astype(int))
+    tables = [fixed_memory_sweep(lengths, args.population_size, args.steps)]
+    if args.growing_steps > 0:
+        growing = growing_memory_run(args.growing_steps, args.population_size)
+        tables.append(growing)
+    table = pd.concat(tables, ignore_index=True)
+    fits = scaling_fits(table, args.fit_min_length)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    table_path = os.path.join(args.results_dir, "memory_scaling.csv")
+    fits_path = os.path.join(args.results_dir, "memory_scaling_fits.csv")
+    table.to_csv(table_path, index=False)
+    fits.to_csv(fits_path, index=False)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print()
+    print(fits.to_string(index=False, float_format=lambda x: f"{x:.3g}"))
+    if args.growing_steps > 0:
+        totals = growing.attrs["total_s"]
+        print(f"Growing history, {args.growing_steps} updates: gl_dot {totals['gl_dot']:.2f} s, "
+              f"history_update {totals['history_update']:.2f} s in total")
+    print(f"Table written to {table_path}, fits to {fits_path}")
+    if not args.no_plot:
+        plot_path = os.path.join(args.results_dir, "memory_scaling.png")
+        plot_scaling(table, fits, plot_path)
+        print(f"Plot saved to {plot_path}")
@@ -0,0 +1,142 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+import gl_coefficients
+import trail
+from santa_fe_ant import AntTrainer, flif_neuron_params, resolve_memory_length, NUM_EPISODES
+
+# Multi-seed / multi-config training of the Santa Fe ant across a process pool.
+# Every job is an independent AntTrainer with its own Generator spawned from one
+# SeedSequence, so results are reproducible for a given base seed regardless of how
+# jobs are scheduled. The trail map and the GL coefficient arrays are built once in the
+# parent and placed in shared memory; workers map them read-only instead of rebuilding
+# them (a 12500-long kernel per (alpha, memory length)).
+
+def _share_array(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+def _attach_array(descriptor):
+    name, shape, dtype = descriptor
+    shm = shared_memory.SharedMemory(name=name) # the parent owns the block and unlinks it
+    array = np.ndarray(shape, dtype, buffer=shm.buf)
+    return shm, array
+
+_worker_shared_blocks = [] # keeps the worker's mappings alive for the life of the process
+
+def _init_worker(trail_descriptor, coefficient_descriptors):
+    shm, grid = _attach_array(trail_descriptor)
+    _worker_shared_blocks.append(shm)
+    trail.use_santa_fe_trail(grid)
+    for (alpha, length, convention), descriptor in coefficient_descriptors.items():
+        shm, coeffs = _attach_array(descriptor)
+        _worker_shared_blocks.append(shm)
+        gl_coefficients.preload_gl_coefficients(alpha, length, convention, coeffs)
+
+def _run_job(job):
+    job_id, config, seed_sequence, num_episodes = job
+    trainer = AntTrainer.from_config(config, rng=np.random.default_rng(seed_sequence))
+    start = time.perf_counter()
+    history = trainer.train(num_episodes, verbose=False)
+    return job_id, history, time.perf_counter() - start
+
+def _coefficient_keys(configs):
+    # (alpha, memory length, convention) of every kernel the configs' neurons will ask for
+    keys = set()
+    for config in configs:
+        params = {**flif_neuron_params, **config}
+        alpha = params["alpha"]
+        keys.add((float(alpha), int(resolve_memory_length(params, alpha)), "gl_history"))
+    return keys
+
+def run_multi_seed(configs, num_seeds, num_episodes=NUM_EPISODES, base_seed=0, max_workers=None):
+    """
+    Trains every config in `configs` (dicts of AntTrainer.from_config overrides) with
+    num_seeds independent seeds and returns one long table with a row per (config, seed,
+    episode): food eaten, total reward, steps, the weights after the update and the
+    wall time of the job.
+    """
+    jobs = list(itertools.product(range(len(configs)), range(num_seeds)))
+    seed_sequences = np.random.SeedSequence(base_seed).spawn(len(jobs))
+
+    shared_blocks = []
+    try:
+        shm, trail_descriptor = _share_array(trail.load_santa_fe_trail(np.uint8))
+        shared_blocks.append(shm)
+        coefficient_descriptors = {}
+        for alpha, length, convention in _coefficient_keys(configs):
+            shm, descriptor = _share_array(gl_coefficients.get_gl_coefficients(alpha, length, convention))
+            shared_blocks.append(shm)
+            coefficient_descriptors[(alpha, length, convention)] = descriptor
+
+        tasks = [(job_id, configs[config_idx], seed_sequences[job_id], num_episodes)
+                 for job_id, (config_idx, _) in enumerate(jobs)]
+        frames = []
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(trail_descriptor, coefficient_descriptors)) as pool:
+            for job_id, history, wall_time in pool.map(_run_job, tasks):
+                config_idx, seed_idx = jobs[job_id]
+                frame = pd.DataFrame({
+                    "config": config_idx,
+                    "seed": seed_idx,
+                    "episode": np.arange(1, num_episodes + 1),
+                    "food_eaten": history["food_eaten"],
+                    "total_reward": history["total_reward"],
+                    "steps": history["steps"],
+                    "window_steps": history["window_steps"],
+                })
+                for name in ("W_food", "W_nofood"):
+                    weights = np.array(history[name])
+                    for k in range(weights.shape[1]):
+                        frame[f"{name}_{k}"] = weights[:, k]
+                for key, value in configs[config_idx].items():
+                    frame[key] = value
+                frame["wall_time_s"] = wall_time
+                frames.append(frame)
+    finally:
+        for shm in shared_blocks:
+            shm.close()
+            shm.unlink()
+    return pd.concat(frames, ignore_index=True)
+
+def summarize(results, window=10):
+    # Per config: mean and spread over seeds of the food eaten in the last `window` episodes
+    last_episodes = results[results["episode"] > results["episode"].max() - window]
+    per_seed = last_episodes.groupby(["config", "seed"])["food_eaten"].mean()
+    return per_seed.groupby("config").agg(["mean", "std", "count"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the Santa Fe ant over many seeds in parallel.")
+    parser.add_argument("--seeds", type=int, default=8)
+    parser.add_argument("--episodes", type=int, default=NUM_EPISODES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--memory-length", type=int, default=None)
+    parser.add_argument("--learning-rates", type=float, nargs="+", default=None)
+    parser.add_argument("--alphas", type=float, nargs="+", default=None)
+    parser.add_argument("--out", default="multi_seed_results.csv")
+    args = parser.parse_args()
+
+    # Grid over the given variants (each flag left out keeps the santa_fe_ant.py default)
+    grid = {"learning_rate": args.learning_rates, "alpha": args.alphas}
+    grid = {key: values for key, values in grid.items() if values}
+    configs = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    if args.memory_length is not None:
+        for config in configs:
+            config["memory_length"] = args.memory_length
+
+    start = time.perf_counter()
+    results = run_multi_seed(configs, args.seeds, args.episodes, args.base_seed, args.workers)
+    elapsed = time.perf_counter() - start
+    results.to_csv(args.out, index=False)
+
+    print(summarize(results))
+    print(f"{len(configs) * args.seeds} jobs on {args.workers} workers in {elapsed:.1f} s, "
+          f"{len(results) / elapsed:.2f} episodes/s. Results written to {args.out}")
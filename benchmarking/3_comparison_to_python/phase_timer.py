@@ -0,0 +1,123 @@
+import csv
+import functools
+import json
+import time
+import numpy as np
+
+# Phase timing for the emulator.
+# A PhaseTimer records the duration of every call of a named phase into a preallocated
+# int64 sample array (perf_counter_ns), so recording never allocates. Phases are attached
+# from the outside by wrapping methods of existing objects (wrap / instrument_trainer);
+# the model classes know nothing about timing and an un-instrumented run executes exactly
+# the same code as before, so disabled timing costs nothing. Phases can nest (leaf_update
+# contains the leaves' gl_dot and history_update calls).
+
+PHASES = ("gl_dot", "history_update", "leaf_update", "env_step", "policy_update")
+PERCENTILES = (50, 90, 99)
+
+class PhaseTimer:
+    """
+    Per-phase call counts and total time over the whole run, plus the last `capacity`
+    durations of each phase for percentiles (older samples are overwritten in a ring).
+    """
+    def __init__(self, phases=PHASES, capacity=1 << 20):
+        self.phases = tuple(phases)
+        self.capacity = capacity
+        self._index = {phase: i for i, phase in enumerate(self.phases)}
+        self._samples = np.zeros((len(self.phases), capacity), dtype=np.int64)
+        self._counts = np.zeros(len(self.phases), dtype=np.int64)
+        self._totals_ns = np.zeros(len(self.phases), dtype=np.int64)
+        self._wrapped = [] # (obj, attribute) pairs set by wrap(), removed by unwrap()
+
+    def reset(self):
+        self._counts.fill(0)
+        self._totals_ns.fill(0)
+
+    def record(self, phase, duration_ns):
+        i = self._index[phase]
+        count = self._counts[i]
+        self._samples[i, count % self.capacity] = duration_ns
+        self._counts[i] = count + 1
+        self._totals_ns[i] += duration_ns
+
+    def wrap(self, obj, method_name, phase):
+        # Times every call of obj.method_name as `phase` (instance attribute shadows the method)
+        method = getattr(obj, method_name)
+        i = self._index[phase]
+        samples, counts, totals_ns, capacity = self._samples, self._counts, self._totals_ns, self.capacity
+        perf_counter_ns = time.perf_counter_ns
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            result = method(*args, **kwargs)
+            duration = perf_counter_ns() - start
+            count = counts[i]
+            samples[i, count % capacity] = duration
+            counts[i] = count + 1
+            totals_ns[i] += duration
+            return result
+
+        setattr(obj, method_name, timed)
+        self._wrapped.append((obj, method_name))
+
+    def unwrap(self):
+        # Restores the original methods (needed before pickling an instrumented object)
+        for obj, method_name in reversed(self._wrapped):
+            delattr(obj, method_name)
+        self._wrapped.clear()
+
+    def samples(self, phase):
+        # Kept durations of `phase` in ns, in call order (all of them while count <= capacity)
+        i = self._index[phase]
+        count = int(self._counts[i])
+        if count <= self.capacity:
+            return self._samples[i, :count].copy()
+        return np.roll(self._samples[i], -(count % self.capacity))
+
+    def summary(self):
+        # {phase: count, total and mean time, percentiles and max of the kept samples, in µs}
+        result = {}
+        for i, phase in enumerate(self.phases):
+            count = int(self._counts[i])
+            kept = self._samples[i, :min(count, self.capacity)] / 1e3
+            row = {"count": count, "total_s": self._totals_ns[i] / 1e9,
+                   "mean_us": self._totals_ns[i] / 1e3 / count if count else 0.0}
+            for q in PERCENTILES:
+                row[f"p{q}_us"] = float(np.percentile(kept, q)) if count else 0.0
+            row["max_us"] = float(kept.max()) if count else 0.0
+            result[phase] = row
+        return result
+
+    def to_json(self, path, **metadata):
+        with open(path, "w") as f:
+            json.dump({**metadata, "phases": self.summary()}, f, indent=2)
+
+    def to_csv(self, path):
+        summary = self.summary()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            columns = list(next(iter(summary.values())).keys())
+            writer.writerow(["phase"] + columns)
+            for phase, row in summary.items():
+                writer.writerow([phase] + [row[column] for column in columns])
+
+    def format_table(self):
+        lines = [f"{'phase':16s} {'calls':>10s} {'total s':>9s} {'mean µs':>9s} {'p50 µs':>9s} {'p90 µs':>9s} {'p99 µs':>9s}"]
+        for phase, row in self.summary().items():
+            lines.append(f"{phase:16s} {row['count']:10d} {row['total_s']:9.3f} {row['mean_us']:9.2f} "
+                         f"{row['p50_us']:9.2f} {row['p90_us']:9.2f} {row['p99_us']:9.2f}")
+        return "\n".join(lines)
+
+def instrument_trainer(trainer, timer):
+    # Standard phases of an AntTrainer (santa_fe_ant): GL history sums and history pushes of
+    # all populations, whole leaf-population steps, environment steps and REINFORCE updates
+    populations = (trainer.context_population,) + tuple(trainer.action_leaf_populations)
+    for population in populations:
+        timer.wrap(population, "_history_sum", "gl_dot")
+        timer.wrap(population, "_push_history", "history_update")
+    for leaf_population in trainer.action_leaf_populations:
+        timer.wrap(leaf_population, "step", "leaf_update")
+    timer.wrap(trainer.environment, "step", "env_step")
+    timer.wrap(trainer, "_update_policy", "policy_update")
+    return timer
@@ -0,0 +1,1215 @@
+import functools
+import math
+import warnings
+import numpy as np
+from trail import load_santa_fe_trail
+from gl_coefficients import get_gl_coefficients, gl_truncated_mass, memory_length_for_tolerance
+from kernels import get_kernel
+
+# Santa Fe ant model: fractional/standard LIF neurons, the trail environment, REINFORCE
+# training and the AntTrainer. Importing this module only defines things; the training
+# run and its diagnostics live in the main.py CLI, so workers, sweeps and benchmarks can
+# import the models without side effects.
+
+# --- Constants and Hyperparameters ---
+# Environment
+GRID_SIZE = 32
+MAX_STEPS_PER_EPISODE = 250
+TOTAL_FOOD_PELLETS_ON_MAP = 89 
+START_POS = (0, 0)  # Assuming top-left, adjust based on map
+START_ORIENTATION = 'EAST' # Example, adjust based on map (0:E, 1:S, 2:W, 3:N)
+
+# SNN Parameters
+FLIF_MEMBRANE_TIME_CONSTANT = 20.0  # ms
+FLIF_THRESHOLD_VOLTAGE = 0.3    # mV (or normalized units)
+FLIF_RESET_VOLTAGE = 0.0    # mV
+FLIF_NEURONS_BIAS = 0.05    # Small bias
+FLIF_FRACTIONAL_ORDER_ALPHA = 0.75
+FLIF_MEMORY_LENGTH = 12500 # full simulation
+FLIF_MEMORY_TOL = None # e.g. 1e-3: choose the memory length from the GL tail mass instead of FLIF_MEMORY_LENGTH
+FLIF_MEMORY_MODE = "exact" # "exact" (full GL dot product) or "compressed" (sum-of-exponentials modes)
+FLIF_COMPRESSION_TOL = 1e-4 # Max L1 error of the compressed GL kernel (history-sum error per unit |V|), at least half the truncated GL mass
+FLIF_DTYPE = np.float64 # Storage dtype of voltages, histories and GL coefficients (np.float32 halves history traffic)
+FLIF_ACCUMULATE_DTYPE = np.float64 # dtype the GL history sum is accumulated in
+FLIF_BACKEND = "numpy" # Kernel backend of the neuron updates: "numpy" or "numba" (falls back to numpy)
+
+LIF_MEMBRANE_TIME_CONSTANT = 20.0  # ms
+LIF_THRESHOLD_VOLTAGE = 0.75        # mV
+LIF_RESET_VOLTAGE = 0.0          # mV
+LIF_NEURONS_BIAS = 0.05
+
+DT_NEURON_SIM = 0.1              # ms
+T_ANT_DECISION_WINDOW = 5.0       # ms
+NUM_NEURON_STEPS_PER_ANT_STEP = int(T_ANT_DECISION_WINDOW / DT_NEURON_SIM)
+# Neurons are reset every episode, so no history is longer than one episode's neuron steps;
+# memory lengths chosen from FLIF_MEMORY_TOL are clamped to this
+FLIF_MAX_MEMORY_LENGTH = MAX_STEPS_PER_EPISODE * NUM_NEURON_STEPS_PER_ANT_STEP
+
+I_ACTIVE_INPUT_CURRENT = 1.5     # Current injected when context is active
+
+# RL Parameters
+LEARNING_RATE_ETA = 0.0001
+DISCOUNT_FACTOR_GAMMA = 0.99
+EXPLORATION_TEMPERATURE_TAU_RL = 1.0 # For softmax
+MAX_GRAD_ABS_VAL = 50.0  # **Tune this value carefully!** Start with something like 1.0 or 5.0.
+EARLY_DECISION = False # End a decision window as soon as the leading action can no longer be overtaken
+DECISION_CONFIDENCE = None # e.g. 0.9: with EARLY_DECISION, also end it once the top softmax probability reaches this
+
+# Surrogate Gradient
+SG_RECT_WIDTH = 0.5             # mV
+
+# Action Mapping
+ACTION_MAP = {0: 'TurnLeft', 1: 'TurnRight', 2: 'MoveForward'}
+ACTION_IDX_MAP = {'TurnLeft':0, 'TurnRight':1, 'MoveForward':2} # For convenience
+
+NUM_EPISODES = 1000 # Example number of training episodes
+# Context layer: row 0 is the food context neuron, row 1 the no-food context neuron
+FOOD_CTX_IDX, NOFOOD_CTX_IDX = 0, 1
+
+NUM_PARALLEL_ANTS = 1 # > 1: train this many ants in lock-step and average their gradients (train_batched)
+
+# --- Helper Functions ---
+def calculate_gl_coefficients(alpha, length, dtype=np.float64):
+    # coeffs[0] = -alpha, coeffs[j] = (1 - (alpha+1)/(j+1)) * coeffs[j-1] (matches user's Cython code).
+    # Shared read-only array from the coefficient store: every neuron with the same
+    # (alpha, length) uses the same copy instead of building its own.
+    return get_gl_coefficients(alpha, length, "gl_history", dtype=dtype)
+
+def resolve_precision(params):
+    # (storage dtype, accumulation dtype); accumulating wider than storage is the mixed-precision mode
+    dtype = np.dtype(params.get("dtype", FLIF_DTYPE))
+    accumulate_dtype = np.dtype(params.get("accumulate_dtype", FLIF_ACCUMULATE_DTYPE))
+    return dtype, max(dtype, accumulate_dtype, key=lambda d: d.itemsize)
+
+def resolve_memory_length(params, alpha):
+    # An error tolerance on the truncated GL mass (short-memory principle) takes
+    # precedence over a fixed memory length; it is clamped to FLIF_MAX_MEMORY_LENGTH
+    memory_tol = params.get("memory_tol", FLIF_MEMORY_TOL)
+    if memory_tol is not None:
+        memory_length = memory_length_for_tolerance(alpha, memory_tol)
+        if memory_length > FLIF_MAX_MEMORY_LENGTH:
+            warnings.warn(f"GL memory tolerance {memory_tol:g} needs length {memory_length} at alpha={alpha}; "
+                          f"clamped to the {FLIF_MAX_MEMORY_LENGTH} neuron steps of an episode "
+                          f"(truncated mass {gl_truncated_mass(alpha, FLIF_MAX_MEMORY_LENGTH):.2e})")
+            return FLIF_MAX_MEMORY_LENGTH
+        return memory_length
+    return params.get("memory_length", FLIF_MEMORY_LENGTH)
+
+def _gl_mode_fit(alpha, length, tol, max_modes):
+    kernel = -calculate_gl_coefficients(alpha, length) # the history coefficients are all <= 0
+    # Candidate decay rates, 8 per decade from ~1/L up to a few steps
+    rates = np.geomspace(0.5 / length, 10.0, int(8 * np.log10(20.0 * length)) + 1)
+    decays = np.exp(-rates)
+    # Least-squares rows: the kernel on [0, L) and zeros on [L, 2L), with relative row
+    # weights so the long, small tail is not ignored next to kernel[0] = alpha
+    target = np.zeros(2 * length)
+    target[:length] = kernel
+    row_weights = 1.0 / np.sqrt(np.maximum(target, kernel[-1]))
+    A = np.exp(-np.outer(np.arange(2 * length), rates)) * row_weights[:, None]
+    b = target * row_weights
+    head_basis = A[:length] / row_weights[:length, None]
+
+    def l1_error(active, weights):
+        # Exact on [0, L); past L the truncated kernel is 0 and the (nonnegative) modes
+        # sum to weights * decays**L / (1 - decays), so the whole infinite tail is counted
+        head = np.sum(np.abs(head_basis[:, active] @ weights - kernel))
+        return head + np.sum(weights * decays[active]**length / (1.0 - decays[active]))
+
+    # Lawson-Hanson nonnegative least squares: every outer iteration adds the candidate
+    # mode that reduces the residual most, so modes are added one at a time and the fit is
+    # checked after each addition. Nonnegative weights cannot cancel each other, which
+    # keeps the fit well-conditioned and the weights below kernel[0].
+    x = np.zeros(rates.size)
+    active = np.zeros(rates.size, dtype=bool)
+    best = (np.inf, None, None)
+    while np.count_nonzero(active) < max_modes:
+        gradient = A.T @ (b - A @ x)
+        gradient[active] = -np.inf
+        k = int(np.argmax(gradient))
+        if gradient[k] <= 1e-12 * np.abs(b).max():
+            break # no mode left that improves the fit
+        active[k] = True
+        while True:
+            z = np.zeros_like(x)
+            z[active] = np.linalg.lstsq(A[:, active], b, rcond=None)[0]
+            if np.all(z[active] > 0):
+                x = z
+                break
+            # Step back to the feasible boundary and drop the modes that hit zero
+            blocking = active & (z <= 0)
+            x += np.min(x[blocking] / (x[blocking] - z[blocking])) * (z - x)
+            active &= x > 0
+            x[~active] = 0.0
+        error = l1_error(active, x[active])
+        if error < best[0]:
+            best = (error, np.flatnonzero(active), x[active].copy())
+        if error <= tol:
+            break
+    error, modes, weights = best
+    return decays[modes], -weights, error
+
+def fit_gl_exponential_modes(alpha, length, tol, max_modes=64):
+    """
+    Approximates calculate_gl_coefficients(alpha, length) by a sum of decaying exponentials,
+    coeffs[j] ~= sum_k weights[k] * decays[k]**j, so the GL history sum can be carried as a
+    few recursively updated modes instead of a length-L dot product.
+
+    l1_error = sum_j |coeffs[j] - approx[j]| over all j >= 0, including the tail past L
+    where the truncated kernel is 0 but the modes are not (a bound on the history-sum
+    error per unit |V|). Modes are added until l1_error <= tol. Exponentials cannot cut
+    off at L, so their tail is of the order of the GL mass the truncation itself drops;
+    tol is therefore raised to gl_truncated_mass(alpha, L) / 2 when it is smaller. If even
+    that is not reached the best fit found is returned with a warning.
+
+    Returns (decays, weights, l1_error). Fits are cached and the arrays are read-only.
+    """
+    tol = max(tol, 0.5 * gl_truncated_mass(alpha, length))
+    decays, weights, l1_error = _cached_gl_mode_fit(alpha, length, tol, max_modes)
+    if l1_error > tol:
+        warnings.warn(f"Compressed GL kernel (alpha={alpha}, length={length}): {len(weights)} modes reach "
+                      f"L1 error {l1_error:.2e}, above the tolerance {tol:.2e}")
+    return decays, weights, l1_error
+
+@functools.lru_cache(maxsize=None)
+def _cached_gl_mode_fit(alpha, length, tol, max_modes):
+    decays, weights, l1_error = _gl_mode_fit(alpha, length, tol, max_modes)
+    decays.flags.writeable = False
+    weights.flags.writeable = False
+    return decays, weights, l1_error
+
+def softmax_stable(logits_array):
+    if not logits_array.size: return np.array([]) # Handle empty array
+    stable_logits = logits_array - np.max(logits_array)
+    exp_logits = np.exp(stable_logits)
+    sum_exp_logits = np.sum(exp_logits)
+    if sum_exp_logits == 0: # Avoid division by zero if all logits are extremely small
+        return np.ones_like(exp_logits) / exp_logits.size
+    return exp_logits / sum_exp_logits
+
+def decision_is_settled(spike_counts, remaining_substeps, confidence=None, temperature=EXPLORATION_TEMPERATURE_TAU_RL):
+    # A leaf resets after every spike, so it fires at most once per remaining sub-step:
+    # once the leader is ahead of the runner-up by more than that, the ranking is final.
+    # Tied leaders never settle, e.g. leaves with equal strong weights that all fire every
+    # sub-step, so only a weight gap between the leaves shortens the window
+    counts = sorted(spike_counts.tolist())
+    if counts[-1] - counts[-2] > remaining_substeps:
+        return True
+    if confidence is not None and counts[-1] > 0:
+        top_probability = 1.0 / sum(math.exp((count - counts[-1]) / temperature) for count in counts)
+        return top_probability >= confidence
+    return False
+
+def calculate_discounted_returns(rewards_list, gamma):
+    # G_t = r_t + gamma * G_{t+1} as a suffix scan in log2(T) array passes: after the pass
+    # with shift s, G_t holds the discounted sum of the rewards t .. t+2s-1 (same as the
+    # backward loop up to rounding; the terms are added in a different order)
+    discounted_returns = np.array(rewards_list, dtype=float)
+    shift, factor = 1, gamma
+    while shift < len(discounted_returns):
+        discounted_returns[:-shift] += factor * discounted_returns[shift:]
+        shift, factor = 2 * shift, factor * factor
+    return discounted_returns
+
+def rectangular_surrogate_gradient(membrane_potential, threshold, width):
+    u = membrane_potential - threshold
+    if abs(u) < width / 2.0:
+        return 1.0 / width
+    return 0.0
+
+def initialize_weights(num_weights, rng=None):
+    rng = np.random if rng is None else rng
+    return (rng.random(num_weights)) * 0.1 + 0.1
+
+# --- Neuron Classes ---
+class FractionalLIFNeuron:
+    def __init__(self, neuron_id, params):
+        self.neuron_id = neuron_id
+        self.alpha = params.get("alpha", FLIF_FRACTIONAL_ORDER_ALPHA)
+        self.tau_m = params.get("tau_m", FLIF_MEMBRANE_TIME_CONSTANT)
+        self.V_th = params.get("V_th", FLIF_THRESHOLD_VOLTAGE)
+        self.V_reset = params.get("V_reset", FLIF_RESET_VOLTAGE)
+        self.bias = params.get("bias", FLIF_NEURONS_BIAS)
+        self.memory_length = resolve_memory_length(params, self.alpha)
+        self.memory_mode = params.get("memory_mode", FLIF_MEMORY_MODE)
+        if self.memory_mode not in ("exact", "compressed"):
+            raise ValueError(f"Unknown memory_mode '{self.memory_mode}', expected 'exact' or 'compressed'")
+        self._compressed = self.memory_mode == "compressed" and self.memory_length > 0
+        self.dtype, self.accumulate_dtype = resolve_precision(params)
+        
+        self.V = self.dtype.type(self.V_reset)
+        self.gl_coefficients = calculate_gl_coefficients(self.alpha, self.memory_length, self.dtype)
+        if self._compressed:
+            # No voltage history at all: each exponential mode k keeps
+            # S_k = sum_j decay_k**j * V[t-j] and is updated in O(1) per step
+            self._mode_decays, self._mode_weights, self.compression_error = fit_gl_exponential_modes(
+                self.alpha, self.memory_length, params.get("compression_tol", FLIF_COMPRESSION_TOL))
+            # Modes of a history holding memory_length copies of V_reset
+            self._initial_mode_states = self.V_reset * (1.0 - self._mode_decays**self.memory_length) / (1.0 - self._mode_decays)
+            self._mode_states = self._initial_mode_states.copy()
+            history_length = 0
+        else:
+            history_length = self.memory_length
+        # Circular history: every value is written twice so that the newest-first window
+        # buffer[head:head+L] is always one contiguous slice (no np.roll copy per update)
+        self._history_buffer = np.full(2 * history_length, self.V_reset, dtype=self.dtype)
+        self._history_head = 0
+        self.spike_state = 0
+        # The exact-memory update (one storage dtype) runs as a registered kernel, see kernels.py
+        self.backend = params.get("backend", FLIF_BACKEND)
+        update_kernel = get_kernel("flif_update", self.backend)
+        use_kernel = not self._compressed and self.memory_length > 0 and self.accumulate_dtype == self.dtype
+        self._update_kernel = update_kernel if use_kernel else None
+
+    def reset_state(self):
+        self.V = self.dtype.type(self.V_reset)
+        self._history_buffer.fill(self.V_reset)
+        self._history_head = 0
+        if self._compressed:
+            self._mode_states[:] = self._initial_mode_states
+        self.spike_state = 0
+
+    @property
+    def voltage_history(self):
+        # Newest-first view of the last memory_length voltages (same layout np.roll produced)
+        return self._history_buffer[self._history_head:self._history_head + self.memory_length]
+
+    def update(self, input_current, dt):
+        if self._update_kernel is not None:
+            self.V, self.spike_state, self._history_head = self._update_kernel(
+                self.V, self._history_buffer, self._history_head, self.memory_length, self.gl_coefficients,
+                input_current, dt**self.alpha, self.tau_m, self.bias, self.V_th, self.V_reset)
+            return
+
+        self.spike_state = 0
+        
+        history_component = 0.0
+        if self._compressed:
+            history_component = np.dot(self._mode_weights, self._mode_states)
+        elif self.memory_length > 0 and self.accumulate_dtype != self.dtype:
+            # Mixed precision: narrow coefficients/history are read (half the memory traffic),
+            # their products are exact in float64 and the sum is accumulated in float64
+            history_component = np.einsum("i,i->", self.gl_coefficients, self.voltage_history,
+                                          dtype=self.accumulate_dtype)
+        elif self.memory_length > 0:
+            history_component = np.dot(self.gl_coefficients, self.voltage_history)
+
+        kernel = dt**self.alpha
+        
+        # Voltage update based on user's Cython code structure
+        # V_new = (-V_old/τm + bias + I_in) * dt^α - GL_history_sum
+        # Note: In the Cython code, V_old is on the right with positive sign, effectively making it
+        # V[t] = V[t-1] + dt^alpha/tau_m * (-V[t-1] + bias*tau_m + I_in*tau_m) - history*dt^alpha (?)
+        # Let's use the one from Cython directly adapted:
+        # hidden_layer_voltages[i] = (-hidden_layer_voltages[i] / membrane_time_constant + neurons_bias + cartpole_inputs[i]) * kernel - hidden_history_component[i]
+        # This assumes V on LHS is V[t] and V on RHS is V[t-dt] before THIS update.
+        
+        # Let's re-interpret for a single step. V is current V (V_old for this step)
+        # The term (-self.V / self.tau_m + self.bias + input_current) is like dV/dt if alpha=1 and no history
+        effective_dV_dt_part = (-self.V / self.tau_m) + self.bias + input_current
+        
+        self.V = self.dtype.type(effective_dV_dt_part * kernel - history_component)
+        # This formulation needs careful check against discrete fractional derivative definitions.
+        # A common form is: V[k] = sum_{j=0}^{mem-1} (-1)^j * C(alpha,j) * I[k-j]*h^alpha - (1/tau) * sum_{j=0}^{mem-1} (-1)^j*C(alpha,j)*V[k-j]*h^alpha
+        # The user's code seems to be:
+        # V_new = (dV_traditional_terms) * dt^alpha - sum(gl_coeffs * V_history)
+        # This implies gl_coeffs are for the fractional derivative of V itself.
+
+        if self.V >= self.V_th:
+            self.spike_state = 1
+            self.V = self.dtype.type(self.V_reset)
+        
+        # Update voltage_history (move the head back one slot and store the new V)
+        if self._compressed:
+            self._mode_states *= self._mode_decays
+            self._mode_states += self.V
+        elif self.memory_length > 0:
+            self._push_history(self.V) # Store post-reset or current subthreshold V
+
+    def _push_history(self, value):
+        self._history_head = (self._history_head - 1) % self.memory_length
+        self._history_buffer[self._history_head] = value
+        self._history_buffer[self._history_head + self.memory_length] = value
+
+    def get_spike_state(self):
+        return self.spike_state
+
+    def get_voltage(self):
+        return self.V
+
+class FractionalLIFPopulation:
+    """
+    N fractional LIF neurons stored as arrays: an N-vector of voltages, an N x L history
+    matrix and one GL coefficient vector shared by the whole population. One step() call
+    advances every neuron with a single matrix-vector product instead of N np.dot calls.
+    """
+    def __init__(self, size, params):
+        self.size = size
+        self.alpha = params.get("alpha", FLIF_FRACTIONAL_ORDER_ALPHA)
+        self.tau_m = params.get("tau_m", FLIF_MEMBRANE_TIME_CONSTANT)
+        self.V_th = params.get("V_th", FLIF_THRESHOLD_VOLTAGE)
+        self.V_reset = params.get("V_reset", FLIF_RESET_VOLTAGE)
+        self.bias = params.get("bias", FLIF_NEURONS_BIAS)
+        self.memory_length = resolve_memory_length(params, self.alpha)
+        self.memory_mode = params.get("memory_mode", FLIF_MEMORY_MODE)
+        if self.memory_mode not in ("exact", "compressed"):
+            raise ValueError(f"Unknown memory_mode '{self.memory_mode}', expected 'exact' or 'compressed'")
+        self._compressed = self.memory_mode == "compressed" and self.memory_length > 0
+        self.dtype, self.accumulate_dtype = resolve_precision(params)
+
+        self.V = np.full(size, self.V_reset, dtype=self.dtype)
+        self.gl_coefficients = calculate_gl_coefficients(self.alpha, self.memory_length, self.dtype)
+        if self._compressed:
+            # (num_modes, size) mode states replace the history matrix, see FractionalLIFNeuron
+            self._mode_decays, self._mode_weights, self.compression_error = fit_gl_exponential_modes(
+                self.alpha, self.memory_length, params.get("compression_tol", FLIF_COMPRESSION_TOL))
+            initial_modes = self.V_reset * (1.0 - self._mode_decays**self.memory_length) / (1.0 - self._mode_decays)
+            self._initial_mode_states = np.repeat(initial_modes[:, None], size, axis=1)
+            self._mode_states = self._initial_mode_states.copy()
+            history_length = 0
+        else:
+            history_length = self.memory_length
+        # Same doubled ring buffer as FractionalLIFNeuron, stored time-major (one row per past
+        # step, one column per neuron) so the history window is a single contiguous block and
+        # pushing a step is one contiguous row write. The head index is shared by all neurons.
+        self._history_buffer = np.full((2 * history_length, size), self.V_reset, dtype=self.dtype)
+        self._history_head = 0
+        self._history_component = np.zeros(size, dtype=self.accumulate_dtype)
+        self.spike_states = np.zeros(size, dtype=int)
+        # Voltage update, threshold and reset after the history sum, see kernels.py
+        self.backend = params.get("backend", FLIF_BACKEND)
+        self._update_kernel = get_kernel("flif_population_update", self.backend)
+
+    def reset_state(self):
+        self.V.fill(self.V_reset)
+        self._history_buffer.fill(self.V_reset)
+        self._history_head = 0
+        if self._compressed:
+            self._mode_states[:] = self._initial_mode_states
+        self.spike_states.fill(0)
+
+    @property
+    def voltage_history(self):
+        # (size, memory_length) newest-first view, row i is neuron i's history
+        return self._history_buffer[self._history_head:self._history_head + self.memory_length].T
+
+    def step(self, input_currents, dt):
+        history_component = self._history_sum()
+        self._update_kernel(self.V, history_component, input_currents, dt**self.alpha, self.tau_m, self.bias,
+                            self.V_th, self.V_reset, self.spike_states)
+        self._push_history()
+        return self.spike_states
+
+    # The two memory phases of step() are separate methods so phase_timer can time them
+    # without touching step() itself
+
+    def _history_sum(self):
+        # GL history term of every neuron, into the preallocated _history_component
+        if self._compressed:
+            np.dot(self._mode_weights, self._mode_states, out=self._history_component)
+        elif self.memory_length > 0:
+            window = self._history_buffer[self._history_head:self._history_head + self.memory_length]
+            if self.accumulate_dtype != self.dtype:
+                # Mixed precision, see FractionalLIFNeuron.update
+                np.einsum("l,ln->n", self.gl_coefficients, window, dtype=self.accumulate_dtype,
+                          out=self._history_component)
+            else:
+                np.dot(self.gl_coefficients, window, out=self._history_component)
+        return self._history_component
+
+    def _push_history(self):
+        # Appends the post-reset voltages to the ring buffer (or folds them into the modes)
+        if self._compressed:
+            self._mode_states *= self._mode_decays[:, None]
+            self._mode_states += self.V
+        elif self.memory_length > 0:
+            self._history_head = (self._history_head - 1) % self.memory_length
+            self._history_buffer[self._history_head] = self.V
+            self._history_buffer[self._history_head + self.memory_length] = self.V
+
+    def get_spike_states(self):
+        return self.spike_states
+
+    def get_voltages(self):
+        return self.V
+
+    def __getstate__(self):
+        # Checkpoints leave out the GL coefficients, they are re-fetched from the shared store
+        state = self.__dict__.copy()
+        del state["gl_coefficients"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.gl_coefficients = calculate_gl_coefficients(self.alpha, self.memory_length, self.dtype)
+
+class FractionalLIFGroups:
+    """
+    num_groups independent groups of group_size fractional LIF neurons. step() advances
+    only the groups it is given, so each group keeps its own clock and GL history exactly
+    as if it were a separate FractionalLIFPopulation (used for the per-ant, per-context
+    leaf populations of the batched trainer, where only the active context is stepped).
+    """
+    def __init__(self, num_groups, group_size, params):
+        self.num_groups = num_groups
+        self.group_size = group_size
+        self.alpha = params.get("alpha", FLIF_FRACTIONAL_ORDER_ALPHA)
+        self.tau_m = params.get("tau_m", FLIF_MEMBRANE_TIME_CONSTANT)
+        self.V_th = params.get("V_th", FLIF_THRESHOLD_VOLTAGE)
+        self.V_reset = params.get("V_reset", FLIF_RESET_VOLTAGE)
+        self.bias = params.get("bias", FLIF_NEURONS_BIAS)
+        self.memory_length = resolve_memory_length(params, self.alpha)
+        self.memory_mode = params.get("memory_mode", FLIF_MEMORY_MODE)
+        if self.memory_mode not in ("exact", "compressed"):
+            raise ValueError(f"Unknown memory_mode '{self.memory_mode}', expected 'exact' or 'compressed'")
+        self._compressed = self.memory_mode == "compressed" and self.memory_length > 0
+        self.dtype, self.accumulate_dtype = resolve_precision(params)
+
+        self.V = np.full((num_groups, group_size), self.V_reset, dtype=self.dtype)
+        self.gl_coefficients = calculate_gl_coefficients(self.alpha, self.memory_length, self.dtype)
+        if self._compressed:
+            # Mode states need no clock, so every group is updated with array ops
+            self._mode_decays, self._mode_weights, self.compression_error = fit_gl_exponential_modes(
+                self.alpha, self.memory_length, params.get("compression_tol", FLIF_COMPRESSION_TOL))
+            initial_modes = self.V_reset * (1.0 - self._mode_decays**self.memory_length) / (1.0 - self._mode_decays)
+            self._initial_mode_states = np.repeat(initial_modes[None, :, None], num_groups, axis=0).repeat(group_size, axis=2)
+            self._mode_states = self._initial_mode_states.copy()
+            history_length = 0
+        else:
+            history_length = self.memory_length
+        # One time-major doubled ring buffer per group (see FractionalLIFPopulation), each
+        # with its own head because groups advance independently
+        self._history_buffer = np.full((num_groups, 2 * history_length, group_size), self.V_reset, dtype=self.dtype)
+        self._history_heads = np.zeros(num_groups, dtype=int)
+        self.spike_states = np.zeros((num_groups, group_size), dtype=int)
+        self.backend = params.get("backend", FLIF_BACKEND)
+        self._update_kernel = get_kernel("flif_population_update", self.backend)
+
+    def reset_state(self):
+        self.V.fill(self.V_reset)
+        self._history_buffer.fill(self.V_reset)
+        self._history_heads.fill(0)
+        if self._compressed:
+            self._mode_states[:] = self._initial_mode_states
+        self.spike_states.fill(0)
+
+    def step(self, groups, input_currents, dt):
+        # groups: distinct group indices to advance, input_currents: (len(groups), group_size)
+        history_component = np.zeros((len(groups), self.group_size), dtype=self.accumulate_dtype)
+        if self._compressed:
+            history_component[:] = np.einsum("m,kmn->kn", self._mode_weights, self._mode_states[groups])
+        elif self.memory_length > 0:
+            # Each group's window starts at its own head, so the GL sums are one gemv per group
+            for i, (g, head) in enumerate(zip(groups, self._history_heads[groups])):
+                window = self._history_buffer[g, head:head + self.memory_length]
+                if self.accumulate_dtype != self.dtype:
+                    np.einsum("l,ln->n", self.gl_coefficients, window, dtype=self.accumulate_dtype,
+                              out=history_component[i])
+                else:
+                    np.dot(self.gl_coefficients, window, out=history_component[i])
+
+        # The kernel works on flat arrays; V and spikes are fresh copies of the selected groups
+        V = self.V[groups]
+        spikes = np.empty(V.shape, dtype=self.spike_states.dtype)
+        self._update_kernel(V.reshape(-1), history_component.reshape(-1),
+                            np.broadcast_to(input_currents, V.shape).reshape(-1), dt**self.alpha, self.tau_m,
+                            self.bias, self.V_th, self.V_reset, spikes.reshape(-1))
+        self.V[groups] = V
+        self.spike_states[groups] = spikes
+
+        if self._compressed:
+            self._mode_states[groups] = self._mode_states[groups] * self._mode_decays[:, None] + V[:, None, :]
+        elif self.memory_length > 0:
+            heads = (self._history_heads[groups] - 1) % self.memory_length
+            self._history_heads[groups] = heads
+            self._history_buffer[groups, heads] = V
+            self._history_buffer[groups, heads + self.memory_length] = V
+        return self.spike_states[groups]
+
+    def get_voltages(self, groups):
+        return self.V[groups]
+
+class StandardLIFNeuron:
+    def __init__(self, neuron_id, params):
+        self.neuron_id = neuron_id
+        self.tau_m = params.get("tau_m", LIF_MEMBRANE_TIME_CONSTANT)
+        self.V_th = params.get("V_th", LIF_THRESHOLD_VOLTAGE)
+        self.V_reset = params.get("V_reset", LIF_RESET_VOLTAGE)
+        self.bias_current = params.get("bias_current", LIF_NEURONS_BIAS) # Assuming bias is a current
+        self.dtype = np.dtype(params.get("dtype", np.float64))
+        
+        self.V = self.dtype.type(self.V_reset)
+        self.spike_state = 0
+
+    def reset_state(self):
+        self.V = self.dtype.type(self.V_reset)
+        self.spike_state = 0
+
+    def update(self, input_current, dt):
+        self.spike_state = 0
+        # dV/dt = (-V + V_rest + bias_current*R_m + input_current*R_m) / tau_m
+        # Assuming V_rest = 0 and R_m is absorbed into currents or tau_m definition.
+        # More simply: dV/dt = (-V/tau_m) + (bias_current + input_current)/C_m
+        # If tau_m = R_m * C_m, then dV/dt = (-V + R_m*(bias_current + input_current))/tau_m
+        # Let's assume bias is a current and input_current is also a current.
+        # dV = ((-self.V / self.tau_m) + self.bias_current + input_current) * dt 
+        # A common discrete form:
+        alpha_decay = self.dtype.type(np.exp(-dt / self.tau_m))
+        self.V = self.V * alpha_decay + (self.bias_current + input_current) * (1 - alpha_decay) * self.tau_m # if tau_m is R*C and I is current
+        # Simpler Euler:
+        # dV_dt = (-self.V + self.bias_current*self.tau_m + input_current*self.tau_m) / self.tau_m # if bias is a voltage-like term
+        dV_dt = (-self.V / self.tau_m) + self.bias_current + input_current # if bias and input_current are currents scaled by 1/C
+        self.V = self.dtype.type(self.V + dV_dt * dt)
+
+
+        if self.V >= self.V_th:
+            self.spike_state = 1
+            self.V = self.dtype.type(self.V_reset)
+
+    def advance(self, duration, input_events=()):
+        """
+        Advances the neuron by `duration` (ms) with the exact solution of
+        dV/dt = -V/tau_m + bias_current + I(t) for a piecewise-constant input. input_events
+        are sorted (time, current) pairs, times relative to now: the input is `current` from
+        that time until the next event (0 before the first one). Between events
+        V(t) = V_inf + (V0 - V_inf) * exp(-t/tau_m) with V_inf = tau_m * (bias_current + I),
+        so threshold crossings are solved for directly and the cost is per event and per
+        spike, not per sub-step. Returns the spike times relative to now. This is the
+        continuous-time equation; update() keeps the baseline discrete step (see
+        lif_fast_forward_report).
+        """
+        if self.V_reset >= self.V_th:
+            raise ValueError(f"advance needs V_reset < V_th, got {self.V_reset} >= {self.V_th}")
+        V = float(self.V)
+        t, current = 0.0, 0.0
+        spike_times = []
+        for event_time, next_current in list(input_events) + [(duration, None)]:
+            segment_end = min(max(event_time, t), duration)
+            V_inf = self.tau_m * (self.bias_current + current)
+            while True:
+                if V >= self.V_th:
+                    t_cross = t
+                elif V_inf > self.V_th:
+                    t_cross = t + self.tau_m * math.log((V_inf - V) / (V_inf - self.V_th))
+                else:
+                    break # V relaxes towards V_inf without reaching the threshold
+                if t_cross > segment_end:
+                    break
+                spike_times.append(t_cross)
+                t, V = t_cross, self.V_reset
+            V = V_inf + (V - V_inf) * math.exp(-(segment_end - t) / self.tau_m)
+            t = segment_end
+            if next_current is not None:
+                current = next_current
+
+        self.V = self.dtype.type(V)
+        self.spike_state = 1 if spike_times else 0
+        return np.array(spike_times)
+            
+    def get_spike_state(self):
+        return self.spike_state
+
+    def get_voltage(self):
+        return self.V
+
+def lif_fast_forward_report(params, input_currents, dt):
+    """
+    Integrates dV/dt = -V/tau_m + bias_current + I with forward Euler (one step per dt) and
+    runs a StandardLIFNeuron through one advance() over the whole sequence, read as
+    piecewise-constant input events, and compares spike counts and spike times. The two
+    agree as dt -> 0. (update() is not the reference: it applies the exponential decay and
+    then an Euler step of the same equation, so it runs the dynamics about twice as fast.)
+    """
+    analytic = StandardLIFNeuron("analytic", params)
+
+    V = float(analytic.V)
+    euler_spike_times = []
+    for step_idx, input_current in enumerate(input_currents):
+        V += ((-V / analytic.tau_m) + analytic.bias_current + input_current) * dt
+        if V >= analytic.V_th:
+            V = analytic.V_reset
+            euler_spike_times.append((step_idx + 1) * dt) # Euler detects the crossing at the end of the step
+
+    input_currents = np.asarray(input_currents, dtype=float)
+    changes = np.flatnonzero(np.diff(input_currents, prepend=0.0))
+    input_events = list(zip(changes * dt, input_currents[changes]))
+    analytic_spike_times = analytic.advance(len(input_currents) * dt, input_events)
+
+    euler_spike_times = np.array(euler_spike_times)
+    num_paired = min(len(euler_spike_times), len(analytic_spike_times))
+    shifts = np.abs(euler_spike_times[:num_paired] - analytic_spike_times[:num_paired])
+    return {
+        "euler_spikes": len(euler_spike_times),
+        "analytic_spikes": len(analytic_spike_times),
+        "num_input_events": len(input_events),
+        "max_spike_time_shift_ms": float(np.max(shifts)) if num_paired else 0.0,
+        "final_voltage_deviation": abs(V - float(analytic.V)),
+    }
+
+def compressed_memory_report(params, input_currents, dt):
+    """
+    Drives an exact-kernel and a compressed-memory FractionalLIFNeuron with the same input
+    sequence and reports how far the compressed voltages deviate from the exact ones.
+    """
+    exact_neuron = FractionalLIFNeuron("exact", {**params, "memory_mode": "exact"})
+    compressed_neuron = FractionalLIFNeuron("compressed", {**params, "memory_mode": "compressed"})
+
+    max_voltage_deviation = 0.0
+    exact_spikes, compressed_spikes = 0, 0
+    for input_current in input_currents:
+        exact_neuron.update(input_current, dt)
+        compressed_neuron.update(input_current, dt)
+        max_voltage_deviation = max(max_voltage_deviation, abs(exact_neuron.V - compressed_neuron.V))
+        exact_spikes += exact_neuron.spike_state
+        compressed_spikes += compressed_neuron.spike_state
+
+    return {
+        "num_modes": len(compressed_neuron._mode_weights),
+        "kernel_l1_error": compressed_neuron.compression_error,
+        "max_voltage_deviation": max_voltage_deviation,
+        "exact_spikes": exact_spikes,
+        "compressed_spikes": compressed_spikes,
+        "floats_per_neuron_exact": exact_neuron._history_buffer.size,
+        "floats_per_neuron_compressed": compressed_neuron._mode_states.size,
+    }
+
+def precision_validation_report(neuron_class, params, input_currents, dt, dtype=np.float32,
+                                accumulate_dtype=np.float64):
+    """
+    Runs a float64 reference neuron and a reduced/mixed-precision copy on the same input
+    sequence and reports how far the spike times of the reduced-precision neuron drift.
+    Works for FractionalLIFNeuron and StandardLIFNeuron.
+    """
+    reference = neuron_class("float64", {**params, "dtype": np.float64, "accumulate_dtype": np.float64})
+    reduced = neuron_class(np.dtype(dtype).name, {**params, "dtype": dtype, "accumulate_dtype": accumulate_dtype})
+
+    reference_spike_steps, reduced_spike_steps = [], []
+    max_voltage_deviation = 0.0
+    for step_idx, input_current in enumerate(input_currents):
+        reference.update(input_current, dt)
+        reduced.update(input_current, dt)
+        if reference.spike_state:
+            reference_spike_steps.append(step_idx)
+        if reduced.spike_state:
+            reduced_spike_steps.append(step_idx)
+        max_voltage_deviation = max(max_voltage_deviation, abs(float(reference.V) - float(reduced.V)))
+
+    reference_spike_steps = np.array(reference_spike_steps)
+    reduced_spike_steps = np.array(reduced_spike_steps)
+    num_paired = min(len(reference_spike_steps), len(reduced_spike_steps))
+    shifts = reduced_spike_steps[:num_paired] - reference_spike_steps[:num_paired]
+    diverged = np.flatnonzero(shifts != 0)
+    return {
+        "dtype": np.dtype(dtype).name,
+        "accumulate_dtype": np.dtype(accumulate_dtype).name,
+        "reference_spikes": len(reference_spike_steps),
+        "reduced_spikes": len(reduced_spike_steps),
+        "first_divergent_spike": int(diverged[0]) if diverged.size else None,
+        "max_spike_time_shift_ms": float(np.max(np.abs(shifts)) * dt) if num_paired else 0.0,
+        "mean_spike_time_shift_ms": float(np.mean(np.abs(shifts)) * dt) if num_paired else 0.0,
+        "max_voltage_deviation": max_voltage_deviation,
+    }
+
+# --- Environment Class ---
+# Orientation codes index these tables: 0 EAST, 1 SOUTH, 2 WEST, 3 NORTH (turning right is +1)
+ORIENTATIONS = ('EAST', 'SOUTH', 'WEST', 'NORTH')
+ORIENTATION_DX = (1, 0, -1, 0)
+ORIENTATION_DY = (0, 1, 0, -1)
+STEP_REWARD = -0.01 # Default step cost
+FOOD_REWARD = 1.0
+
+class SantaFeEnvironment:
+    def __init__(self, map_filepath, start_pos, start_orientation_str):
+        self.trail_map_original = self._load_map(map_filepath)
+        self.trail_map_current = np.copy(self.trail_map_original)
+        self.start_pos = start_pos
+        self.start_orientation_str = start_orientation_str # 'EAST', 'SOUTH', 'WEST', 'NORTH'
+        self.start_orientation_idx = ORIENTATIONS.index(start_orientation_str)
+        self.orientations = list(ORIENTATIONS)
+        self.ant_x, self.ant_y = None, None
+        self.ant_orientation_idx = None # Index in ORIENTATIONS
+        self.food_eaten_in_episode = 0
+        self.grid_height, self.grid_width = self.trail_map_original.shape
+        self.total_food_on_map = int(np.sum(self.trail_map_original))
+        self._eaten_cells = [] # (y, x) of food eaten since the last reset
+
+    def _load_map(self, filepath):
+        # Placeholder: Load your Koza trail map here
+        # Example: return np.loadtxt(filepath, dtype=int)
+        print(f"Placeholder: Load Koza trail map from {filepath}")
+        return load_santa_fe_trail(np.uint8)
+
+    @property
+    def ant_pos(self):
+        return (self.ant_x, self.ant_y)
+
+    def reset_ant_and_trail(self):
+        # Only the eaten cells differ from the original map, so only they are restored
+        for cell in self._eaten_cells:
+            self.trail_map_current[cell] = 1
+        self._eaten_cells.clear()
+        self.ant_x, self.ant_y = self.start_pos
+        self.ant_orientation_idx = self.start_orientation_idx
+        self.food_eaten_in_episode = 0
+        return self.ant_pos, ORIENTATIONS[self.ant_orientation_idx], self.total_food_on_map
+
+    def get_food_ahead(self):
+        front_x = self.ant_x + ORIENTATION_DX[self.ant_orientation_idx]
+        front_y = self.ant_y + ORIENTATION_DY[self.ant_orientation_idx]
+        if 0 <= front_x < self.grid_width and 0 <= front_y < self.grid_height:
+            return self.trail_map_current[front_y, front_x] == 1 # Assuming map is (y,x)
+        return False # Off grid means no food
+
+    def step(self, action_idx): # action_idx: 0:L, 1:R, 2:Fwd
+        reward = STEP_REWARD
+        episode_done_env = False
+        food_consumed_flag = False
+
+        if action_idx == 0: # TurnLeft
+            self.ant_orientation_idx = (self.ant_orientation_idx - 1) % 4
+        elif action_idx == 1: # TurnRight
+            self.ant_orientation_idx = (self.ant_orientation_idx + 1) % 4
+        elif action_idx == 2: # MoveForward
+            next_x = self.ant_x + ORIENTATION_DX[self.ant_orientation_idx]
+            next_y = self.ant_y + ORIENTATION_DY[self.ant_orientation_idx]
+
+            # Bumping the boundary leaves the ant in place with the step cost
+            if 0 <= next_x < self.grid_width and 0 <= next_y < self.grid_height:
+                self.ant_x, self.ant_y = next_x, next_y
+                if self.trail_map_current[next_y, next_x] == 1:
+                    reward = FOOD_REWARD
+                    self.trail_map_current[next_y, next_x] = 0 # Eat food
+                    self._eaten_cells.append((next_y, next_x))
+                    self.food_eaten_in_episode += 1
+                    food_consumed_flag = True
+                    if self.food_eaten_in_episode == TOTAL_FOOD_PELLETS_ON_MAP: # Use actual total from loaded map
+                        episode_done_env = True
+
+        return self.ant_pos, ORIENTATIONS[self.ant_orientation_idx], reward, episode_done_env, food_consumed_flag
+
+class SantaFeBatchEnvironment:
+    """
+    num_ants independent Santa Fe ants, each with its own copy of the trail, stored as
+    arrays: positions and orientation codes are (num_ants,) ints and the trails one
+    (num_ants, H, W) uint8 block. Methods take an optional `ants` index array so that
+    finished ants can be left out; step(actions) moves all given ants at once.
+    """
+    def __init__(self, num_ants, start_pos, start_orientation_str):
+        self.num_ants = num_ants
+        self.trail_map_original = load_santa_fe_trail(np.uint8)
+        self.trail_maps = np.repeat(self.trail_map_original[np.newaxis], num_ants, axis=0)
+        self.grid_height, self.grid_width = self.trail_map_original.shape
+        self.total_food_on_map = int(np.sum(self.trail_map_original))
+        self.start_pos = start_pos
+        self.start_orientation_idx = ORIENTATIONS.index(start_orientation_str)
+        self._dx = np.array(ORIENTATION_DX)
+        self._dy = np.array(ORIENTATION_DY)
+
+        self.ant_x = np.full(num_ants, start_pos[0])
+        self.ant_y = np.full(num_ants, start_pos[1])
+        self.ant_orientation_idx = np.full(num_ants, self.start_orientation_idx)
+        self.food_eaten_in_episode = np.zeros(num_ants, dtype=int)
+        self._eaten_cells = [] # (ants, ys, xs) index arrays of food eaten since the last reset
+
+    def _ants(self, ants):
+        return np.arange(self.num_ants) if ants is None else ants
+
+    def reset(self):
+        if self._eaten_cells:
+            ants, ys, xs = (np.concatenate(idx) for idx in zip(*self._eaten_cells))
+            self.trail_maps[ants, ys, xs] = 1
+            self._eaten_cells.clear()
+        self.ant_x.fill(self.start_pos[0])
+        self.ant_y.fill(self.start_pos[1])
+        self.ant_orientation_idx.fill(self.start_orientation_idx)
+        self.food_eaten_in_episode.fill(0)
+
+    def get_food_ahead(self, ants=None):
+        ants = self._ants(ants)
+        orientation = self.ant_orientation_idx[ants]
+        front_x = self.ant_x[ants] + self._dx[orientation]
+        front_y = self.ant_y[ants] + self._dy[orientation]
+        on_grid = (front_x >= 0) & (front_x < self.grid_width) & (front_y >= 0) & (front_y < self.grid_height)
+        # Off-grid cells are looked up at a clipped index and masked out (off grid means no food)
+        food = self.trail_maps[ants, np.clip(front_y, 0, self.grid_height - 1), np.clip(front_x, 0, self.grid_width - 1)] == 1
+        return food & on_grid
+
+    def step(self, actions, ants=None):
+        # actions: (len(ants),) codes 0:L, 1:R, 2:Fwd. Returns rewards, done and food-eaten flags.
+        ants = self._ants(ants)
+        orientation = self.ant_orientation_idx[ants]
+        orientation = np.where(actions == 0, (orientation - 1) % 4, orientation)
+        orientation = np.where(actions == 1, (orientation + 1) % 4, orientation)
+        self.ant_orientation_idx[ants] = orientation
+
+        next_x = self.ant_x[ants] + self._dx[orientation]
+        next_y = self.ant_y[ants] + self._dy[orientation]
+        moves = (actions == 2) & (next_x >= 0) & (next_x < self.grid_width) & (next_y >= 0) & (next_y < self.grid_height)
+        movers, next_x, next_y = ants[moves], next_x[moves], next_y[moves]
+        self.ant_x[movers] = next_x
+        self.ant_y[movers] = next_y
+
+        eats = self.trail_maps[movers, next_y, next_x] == 1
+        eaters, eaten_y, eaten_x = movers[eats], next_y[eats], next_x[eats]
+        self.trail_maps[eaters, eaten_y, eaten_x] = 0
+        if eaters.size:
+            self._eaten_cells.append((eaters, eaten_y, eaten_x))
+
+        food_consumed = np.zeros(len(ants), dtype=bool)
+        food_consumed[np.flatnonzero(moves)[eats]] = True
+        self.food_eaten_in_episode[ants] += food_consumed
+        rewards = np.where(food_consumed, FOOD_REWARD, STEP_REWARD)
+        episode_done = food_consumed & (self.food_eaten_in_episode[ants] == TOTAL_FOOD_PELLETS_ON_MAP)
+        return rewards, episode_done, food_consumed
+
+# --- Policy Gradient ---
+class EpisodeTrajectory:
+    """
+    Preallocated per-episode record of everything the REINFORCE update needs. Row t of each
+    array is ant step t; only the first `length` rows belong to the current episode.
+    With num_ants the arrays get a leading ant axis and `length` is one count per ant.
+    """
+    def __init__(self, max_steps, num_substeps, num_actions=3, num_ants=None):
+        batch = () if num_ants is None else (num_ants,)
+        self.is_food_ahead = np.zeros(batch + (max_steps,), dtype=bool)
+        self.fLIF_spike_traces = np.zeros(batch + (max_steps, num_substeps), dtype=int)
+        self.leaf_potentials = np.zeros(batch + (max_steps, num_actions, num_substeps))
+        self.chosen_actions = np.zeros(batch + (max_steps,), dtype=int)
+        self.action_probabilities = np.zeros(batch + (max_steps, num_actions))
+        self.rewards = np.zeros(batch + (max_steps,))
+        self.window_lengths = np.full(batch + (max_steps,), num_substeps, dtype=int) # sub-steps simulated per decision
+        self.length = 0 if num_ants is None else np.zeros(num_ants, dtype=int)
+
+    def reset(self):
+        # Rows past `length` are overwritten before they are read again
+        self.length = 0 if np.isscalar(self.length) else np.zeros_like(self.length)
+
+    def record(self, is_food_ahead, chosen_action_idx, action_probabilities, reward, window_length=None):
+        # The spike and potential traces of this step are written in place during the step
+        t = self.length
+        self.is_food_ahead[t] = is_food_ahead
+        self.chosen_actions[t] = chosen_action_idx
+        self.action_probabilities[t] = action_probabilities
+        self.rewards[t] = reward
+        self.window_lengths[t] = self.fLIF_spike_traces.shape[-1] if window_length is None else window_length
+        self.length += 1
+
+    def record_batch(self, ants, t, is_food_ahead, chosen_actions, action_probabilities, rewards,
+                     fLIF_spike_traces, leaf_potentials):
+        # Step t of the ants in `ants` (batched trajectories, all ants advance in lock-step)
+        self.is_food_ahead[ants, t] = is_food_ahead
+        self.chosen_actions[ants, t] = chosen_actions
+        self.action_probabilities[ants, t] = action_probabilities
+        self.rewards[ants, t] = rewards
+        self.fLIF_spike_traces[ants, t] = fLIF_spike_traces
+        self.leaf_potentials[ants, t] = leaf_potentials
+        self.length[ants] = t + 1
+
+    def ant(self, k):
+        # Single-ant view into a batched trajectory (no copies)
+        view = EpisodeTrajectory.__new__(EpisodeTrajectory)
+        for name in ("is_food_ahead", "fLIF_spike_traces", "leaf_potentials", "chosen_actions",
+                     "action_probabilities", "rewards", "window_lengths"):
+            setattr(view, name, getattr(self, name)[k])
+        view.length = int(self.length[k])
+        return view
+
+def normalized_returns(rewards, gamma):
+    # Discounted returns G_t, centred and (unless they are all equal) scaled to unit variance
+    discounted_returns_G_t = calculate_discounted_returns(rewards, gamma)
+    if len(discounted_returns_G_t) > 1:
+        discounted_returns_G_t -= np.mean(discounted_returns_G_t)
+        std_G_t = np.sqrt(np.dot(discounted_returns_G_t, discounted_returns_G_t) / len(discounted_returns_G_t))
+        if std_G_t > 1e-8: # Add a small epsilon to prevent division by zero if all G_t are the same
+            discounted_returns_G_t /= std_G_t
+        return discounted_returns_G_t # Just centred if std is tiny
+    # One step: G_0 as is; no transitions: empty
+    return discounted_returns_G_t
+
+def reinforce_weight_deltas(trajectory, returns, V_th, sg_width, temperature):
+    """
+    REINFORCE deltas for (W_food_to_action, W_nofood_to_action) from one episode, using
+    the rectangular surrogate gradient of each leaf for dN_k/dw_k. `returns` holds the
+    (normalized) return G_t of every recorded step. The array reductions add the steps in
+    a different order than the per-transition loop they replace, so the deltas agree with
+    it to rounding (~1e-14 relative), not bit for bit.
+    """
+    n = trajectory.length
+    # dN_k/dw_k ~ number of presynaptic spikes while leaf k was within sg_width/2 of V_th.
+    # Built as one boolean mask in place, so no float or int64 temporaries of the traces are made
+    leaf_potentials = trajectory.leaf_potentials[:n]
+    half_width = sg_width / 2.0
+    sensitive = leaf_potentials > V_th - half_width
+    sensitive &= leaf_potentials < V_th + half_width
+    sensitive &= trajectory.fLIF_spike_traces[:n, np.newaxis, :] != 0
+    dNk_dwk = np.add.reduce(sensitive, axis=2, dtype=np.int32)
+
+    indicator = trajectory.chosen_actions[:n, np.newaxis] == np.arange(3) # one-hot, no index arrays
+    grad_log_pi = (indicator - trajectory.action_probabilities[:n]) * (1.0 / temperature) * dNk_dwk
+    weighted = returns[:n, np.newaxis] * grad_log_pi
+
+    # Per-context sums as mask @ weighted products
+    food = trajectory.is_food_ahead[:n]
+    return food @ weighted, ~food @ weighted
+
+def train_batched(num_ants, num_episodes, flif_params, leaf_V_th, W_food_to_action, W_nofood_to_action,
+                  window=10, learning_rate=LEARNING_RATE_ETA, input_current=I_ACTIVE_INPUT_CURRENT,
+                  max_grad_abs_val=MAX_GRAD_ABS_VAL, rng=None, verbose=True):
+    """
+    Trains num_ants independent ants in lock-step: every ant has its own trail, position,
+    orientation and FLIF state, and each neuron sub-step advances all of them with array
+    operations. One weight update per batch uses the REINFORCE deltas averaged over the
+    batch's episodes. The weight arrays are updated in place; returns the food eaten by
+    every ant in every batch, shape (num_batches, num_ants).
+    """
+    rng = np.random if rng is None else rng
+    environment = SantaFeBatchEnvironment(num_ants, START_POS, START_ORIENTATION)
+    # Ant k owns context neurons 2k (food) and 2k+1 (no food) and, with the same
+    # numbering, leaf group 2k + context
+    context_population = FractionalLIFPopulation(2 * num_ants, flif_params)
+    leaf_groups = FractionalLIFGroups(2 * num_ants, 3, flif_params)
+    trajectories = EpisodeTrajectory(MAX_STEPS_PER_EPISODE, NUM_NEURON_STEPS_PER_ANT_STEP, num_ants=num_ants)
+    ants = np.arange(num_ants)
+
+    num_batches = -(-num_episodes // num_ants)
+    food_eaten_per_batch = np.zeros((num_batches, num_ants), dtype=int)
+    for batch_i in range(num_batches):
+        environment.reset()
+        context_population.reset_state()
+        leaf_groups.reset_state()
+        trajectories.reset()
+        weights = np.stack((W_food_to_action, W_nofood_to_action)) # rows follow FOOD_CTX_IDX, NOFOOD_CTX_IDX
+        running = np.ones(num_ants, dtype=bool)
+        food_eaten = food_eaten_per_batch[batch_i]
+
+        for t_ant_step in range(MAX_STEPS_PER_EPISODE):
+            live = ants[running]
+            is_food_ahead = environment.get_food_ahead(live)
+            active_ctx = np.where(is_food_ahead, FOOD_CTX_IDX, NOFOOD_CTX_IDX)
+            active_columns = 2 * live + active_ctx
+
+            context_input_currents = np.zeros(2 * num_ants)
+            context_input_currents[active_columns] = input_current
+            active_weights = weights[active_ctx]
+
+            fLIF_spike_traces = np.zeros((len(live), NUM_NEURON_STEPS_PER_ANT_STEP), dtype=int)
+            leaf_potentials = np.zeros((len(live), 3, NUM_NEURON_STEPS_PER_ANT_STEP))
+            leaf_spike_counts = np.zeros((len(live), 3), dtype=int)
+            for t_neuron_idx in range(NUM_NEURON_STEPS_PER_ANT_STEP):
+                context_spikes = context_population.step(context_input_currents, DT_NEURON_SIM)
+                fLIF_spike_traces[:, t_neuron_idx] = context_spikes[active_columns]
+
+                synaptic_currents_to_leaves = fLIF_spike_traces[:, t_neuron_idx, np.newaxis] * active_weights
+                leaf_spike_counts += leaf_groups.step(active_columns, synaptic_currents_to_leaves, DT_NEURON_SIM)
+                leaf_potentials[:, :, t_neuron_idx] = leaf_groups.get_voltages(active_columns)
+
+            # Row-wise softmax_stable; ants without leaf spikes choose uniformly
+            exp_logits = np.exp(leaf_spike_counts / EXPLORATION_TEMPERATURE_TAU_RL -
+                                np.max(leaf_spike_counts / EXPLORATION_TEMPERATURE_TAU_RL, axis=1, keepdims=True))
+            action_probabilities = exp_logits / np.sum(exp_logits, axis=1, keepdims=True)
+            action_probabilities[np.sum(leaf_spike_counts, axis=1) == 0] = 1.0 / 3.0
+
+            # Inverse-CDF sampling, the same draw np.random.choice(3, p=...) makes for one ant
+            cdf = np.cumsum(action_probabilities, axis=1)
+            cdf /= cdf[:, -1:]
+            chosen_actions = np.sum(cdf <= rng.random(len(live))[:, np.newaxis], axis=1)
+
+            rewards, episode_done_env, food_consumed = environment.step(chosen_actions, live)
+            food_eaten[live] += food_consumed
+            running[live[episode_done_env | (food_eaten[live] == TOTAL_FOOD_PELLETS_ON_MAP)]] = False
+
+            trajectories.record_batch(live, t_ant_step, is_food_ahead, chosen_actions, action_probabilities,
+                                      rewards, fLIF_spike_traces, leaf_potentials)
+            if not running.any():
+                break
+
+        delta_W = np.zeros((2, 3))
+        for k in ants:
+            trajectory = trajectories.ant(k)
+            returns = normalized_returns(trajectory.rewards[:trajectory.length], DISCOUNT_FACTOR_GAMMA)
+            delta_food, delta_nofood = reinforce_weight_deltas(
+                trajectory, returns, leaf_V_th, SG_RECT_WIDTH, EXPLORATION_TEMPERATURE_TAU_RL)
+            delta_W[FOOD_CTX_IDX] += delta_food
+            delta_W[NOFOOD_CTX_IDX] += delta_nofood
+        delta_W /= num_ants
+        np.clip(delta_W, -max_grad_abs_val, max_grad_abs_val, out=delta_W)
+
+        W_food_to_action += learning_rate * delta_W[FOOD_CTX_IDX]
+        W_nofood_to_action += learning_rate * delta_W[NOFOOD_CTX_IDX]
+
+        if verbose and (batch_i+1) % window == 0:
+            print(f"Batch {batch_i+1} ({(batch_i+1) * num_ants} episodes): Mean Steps={np.mean(trajectories.length):.1f}, "
+                  f"Average Food Eaten={np.mean(food_eaten_per_batch[batch_i+1-window:batch_i+1]):.2f}, "
+                  f"W_food=[{W_food_to_action[0]:.3f}, {W_food_to_action[1]:.3f}, {W_food_to_action[2]:.3f}], "
+                  f"W_nofood=[{W_nofood_to_action[0]:.3f}, {W_nofood_to_action[1]:.3f}, {W_nofood_to_action[2]:.3f}]")
+    return food_eaten_per_batch
+
+# --- Trainer ---
+flif_neuron_params = {
+    "alpha": FLIF_FRACTIONAL_ORDER_ALPHA, "tau_m": FLIF_MEMBRANE_TIME_CONSTANT,
+    "V_th": FLIF_THRESHOLD_VOLTAGE, "V_reset": FLIF_RESET_VOLTAGE,
+    "bias": FLIF_NEURONS_BIAS, "memory_length": FLIF_MEMORY_LENGTH, "memory_tol": FLIF_MEMORY_TOL,
+    "memory_mode": FLIF_MEMORY_MODE, "compression_tol": FLIF_COMPRESSION_TOL,
+    "dtype": FLIF_DTYPE, "accumulate_dtype": FLIF_ACCUMULATE_DTYPE, "backend": FLIF_BACKEND
+}
+lif_leaf_params = {
+    "tau_m": LIF_MEMBRANE_TIME_CONSTANT, "V_th": LIF_THRESHOLD_VOLTAGE,
+    "V_reset": LIF_RESET_VOLTAGE, "bias_current": LIF_NEURONS_BIAS # Assuming bias is current
+}
+
+class AntTrainer:
+    """
+    Single-ant REINFORCE training state: context and leaf populations, environment,
+    weights and the per-episode history. All randomness is drawn from `rng` (a NumPy
+    Generator, or the global np.random state when None), so a trainer with its own
+    Generator is self-contained and can be pickled and resumed.
+    With early_decision, a decision window ends as soon as decision_is_settled says the
+    action ranking (or, with decision_confidence, the top action) can no longer change;
+    history["window_steps"] holds the mean window length of every episode.
+    """
+    # Keys of a config dict (see from_config) that go to the FLIF neurons, the rest are trainer arguments
+    FLIF_PARAM_KEYS = tuple(flif_neuron_params)
+
+    def __init__(self, flif_params=None, learning_rate=LEARNING_RATE_ETA, input_current=I_ACTIVE_INPUT_CURRENT,
+                 max_grad_abs_val=MAX_GRAD_ABS_VAL, leaf_V_th=LIF_THRESHOLD_VOLTAGE, early_decision=EARLY_DECISION,
+                 decision_confidence=DECISION_CONFIDENCE, rng=None):
+        self.flif_params = dict(flif_neuron_params if flif_params is None else flif_params)
+        self.learning_rate = learning_rate
+        self.input_current = input_current
+        self.max_grad_abs_val = max_grad_abs_val
+        self.leaf_V_th = leaf_V_th
+        self.early_decision = early_decision
+        self.decision_confidence = decision_confidence
+        self.rng = rng
+
+        self.context_population = FractionalLIFPopulation(2, self.flif_params)
+        # One 3-neuron leaf population per context (indexed like the context neurons);
+        # only the active context's leaves are stepped
+        self.action_leaf_populations = (FractionalLIFPopulation(3, self.flif_params),
+                                        FractionalLIFPopulation(3, self.flif_params))
+        self.W_food_to_action = initialize_weights(3, rng)
+        self.W_nofood_to_action = initialize_weights(3, rng)
+
+        self.environment = SantaFeEnvironment("koza_trail.txt", START_POS, START_ORIENTATION)
+        self.trajectory = EpisodeTrajectory(MAX_STEPS_PER_EPISODE, NUM_NEURON_STEPS_PER_ANT_STEP)
+        self.episodes_done = 0
+        self.history = {"food_eaten": [], "total_reward": [], "steps": [], "W_food": [], "W_nofood": [],
+                        "window_steps": []}
+
+    @classmethod
+    def from_config(cls, config, rng=None):
+        # config: flat dict of overrides, e.g. {"alpha": 0.6, "V_th": 0.25, "learning_rate": 1e-3}
+        flif_params = dict(flif_neuron_params)
+        trainer_kwargs = {}
+        for key, value in config.items():
+            if key in cls.FLIF_PARAM_KEYS:
+                flif_params[key] = value
+            else:
+                trainer_kwargs[key] = value
+        return cls(flif_params, rng=rng, **trainer_kwargs)
+
+    def run_episode(self):
+        # One episode followed by one REINFORCE update; returns (food eaten, total reward, steps)
+        rng = np.random if self.rng is None else self.rng
+        environment, trajectory = self.environment, self.trajectory
+        environment.reset_ant_and_trail()
+        self.context_population.reset_state()
+        for leaf_population in self.action_leaf_populations:
+            leaf_population.reset_state()
+
+        trajectory.reset()
+        total_episode_reward = 0.0
+        food_eaten_this_episode = 0
+
+        for t_ant_step in range(MAX_STEPS_PER_EPISODE):
+            is_food_ahead = environment.get_food_ahead()
+
+            active_ctx_idx = FOOD_CTX_IDX if is_food_ahead else NOFOOD_CTX_IDX
+
+            context_input_currents = np.zeros(2)
+            context_input_currents[active_ctx_idx] = self.input_current # inactive context gets 0.0
+
+            active_leaf_population = self.action_leaf_populations[active_ctx_idx]
+            active_weights = self.W_food_to_action if is_food_ahead else self.W_nofood_to_action
+
+            # Traces are written straight into this step's trajectory rows
+            fLIF_spike_trace_this_T_ant = trajectory.fLIF_spike_traces[t_ant_step]
+            leaf_potentials_this_T_ant = trajectory.leaf_potentials[t_ant_step]
+            current_T_ant_leaf_spike_counts = np.zeros(3, dtype=int)
+
+            window_length = NUM_NEURON_STEPS_PER_ANT_STEP
+            for t_neuron_idx in range(NUM_NEURON_STEPS_PER_ANT_STEP):
+                context_spikes = self.context_population.step(context_input_currents, DT_NEURON_SIM)
+                fLIF_spike_trace_this_T_ant[t_neuron_idx] = context_spikes[active_ctx_idx]
+
+                synaptic_currents_to_leaves = fLIF_spike_trace_this_T_ant[t_neuron_idx] * active_weights
+                current_T_ant_leaf_spike_counts += active_leaf_population.step(synaptic_currents_to_leaves, DT_NEURON_SIM)
+                leaf_potentials_this_T_ant[:, t_neuron_idx] = active_leaf_population.get_voltages()
+
+                remaining_substeps = NUM_NEURON_STEPS_PER_ANT_STEP - t_neuron_idx - 1
+                if self.early_decision and remaining_substeps and decision_is_settled(
+                        current_T_ant_leaf_spike_counts, remaining_substeps, self.decision_confidence):
+                    window_length = t_neuron_idx + 1
+                    # Sub-steps that were not simulated carry no presynaptic spikes into the gradient
+                    fLIF_spike_trace_this_T_ant[window_length:] = 0
+                    break
+
+            action_probabilities = softmax_stable(current_T_ant_leaf_spike_counts / EXPLORATION_TEMPERATURE_TAU_RL)
+
+            # Handle case where all spike counts are zero -> uniform probabilities
+            if np.sum(current_T_ant_leaf_spike_counts) == 0 :
+                 action_probabilities = np.ones(3) / 3.0
+
+            chosen_action_idx = rng.choice(3, p=action_probabilities)
+
+            _, _, reward, episode_done_env, food_consumed_flag = environment.step(chosen_action_idx)
+
+            total_episode_reward += reward
+            if food_consumed_flag:
+                 food_eaten_this_episode +=1
+
+            trajectory.record(is_food_ahead, chosen_action_idx, action_probabilities, reward, window_length)
+
+            if episode_done_env or food_eaten_this_episode == TOTAL_FOOD_PELLETS_ON_MAP:
+                break
+
+        self._update_policy()
+
+        self.episodes_done += 1
+        self.history["food_eaten"].append(food_eaten_this_episode)
+        self.history["total_reward"].append(total_episode_reward)
+        self.history["steps"].append(t_ant_step + 1)
+        self.history["W_food"].append(self.W_food_to_action.copy())
+        self.history["W_nofood"].append(self.W_nofood_to_action.copy())
+        self.history["window_steps"].append(float(np.mean(trajectory.window_lengths[:trajectory.length])))
+        return food_eaten_this_episode, total_episode_reward, t_ant_step + 1
+
+    def _update_policy(self):
+        # REINFORCE update of both weight vectors from the episode in self.trajectory
+        trajectory = self.trajectory
+        normalized_G_t_values = normalized_returns(trajectory.rewards[:trajectory.length], DISCOUNT_FACTOR_GAMMA)
+
+        delta_W_food_to_action, delta_W_nofood_to_action = reinforce_weight_deltas(
+            trajectory, normalized_G_t_values, self.leaf_V_th, SG_RECT_WIDTH, EXPLORATION_TEMPERATURE_TAU_RL)
+
+        np.clip(delta_W_food_to_action, -self.max_grad_abs_val, self.max_grad_abs_val, out=delta_W_food_to_action)
+        np.clip(delta_W_nofood_to_action, -self.max_grad_abs_val, self.max_grad_abs_val, out=delta_W_nofood_to_action)
+
+        self.W_food_to_action += self.learning_rate * delta_W_food_to_action
+        self.W_nofood_to_action += self.learning_rate * delta_W_nofood_to_action
+
+    def train(self, num_episodes, window=10, verbose=True):
+        avg_food_eaten = 0
+        for _ in range(num_episodes):
+            food_eaten_this_episode, total_episode_reward, steps = self.run_episode()
+            if self.episodes_done % window == 0:
+                avg_food_eaten += food_eaten_this_episode
+                avg_food_eaten /= window
+                if verbose:
+                    W_food_to_action, W_nofood_to_action = self.W_food_to_action, self.W_nofood_to_action
+                    print(f"Episode {self.episodes_done}: Steps={steps}, Average Food Eaten={avg_food_eaten}, Total Reward={total_episode_reward:.2f}, "
+                      f"W_food=[{W_food_to_action[0]:.3f}, {W_food_to_action[1]:.3f}, {W_food_to_action[2]:.3f}], "
+                      f"W_nofood=[{W_nofood_to_action[0]:.3f}, {W_nofood_to_action[1]:.3f}, {W_nofood_to_action[2]:.3f}]")
+                avg_food_eaten = 0
+            else:
+                avg_food_eaten += food_eaten_this_episode
+        return self.history
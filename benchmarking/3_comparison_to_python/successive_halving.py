@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from santa_fe_ant import AntTrainer, NUM_EPISODES
+
+# Successive-halving search over ant training hyperparameters.
+# All configurations start with a small episode budget; after every round the better half
+# (by rolling average of food eaten) continues with `growth` times more episodes and the
+# rest are dropped. Every trainer is pickled to a checkpoint after its round, so survivors
+# resume exactly where they stopped (weights, RNG state, history) and an interrupted sweep
+# can be restarted with the same command.
+
+# Default search space: (low, high, scale) per AntTrainer.from_config key
+SEARCH_SPACE = {
+    "learning_rate": (1e-5, 1e-2, "log"),   # LEARNING_RATE_ETA
+    "V_th": (0.1, 0.6, "linear"),            # FLIF_THRESHOLD_VOLTAGE
+    "input_current": (0.5, 3.0, "linear"),   # I_ACTIVE_INPUT_CURRENT
+    "max_grad_abs_val": (1.0, 100.0, "log"),
+    "alpha": (0.5, 0.95, "linear"),          # FLIF_FRACTIONAL_ORDER_ALPHA
+}
+
+def sample_configs(num_configs, rng, search_space=SEARCH_SPACE, fixed=None):
+    configs = []
+    for _ in range(num_configs):
+        config = dict(fixed or {})
+        for key, (low, high, scale) in search_space.items():
+            if scale == "log":
+                config[key] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            else:
+                config[key] = float(rng.uniform(low, high))
+        configs.append(config)
+    return configs
+
+def rolling_food(trainer, window):
+    return float(np.mean(trainer.history["food_eaten"][-window:]))
+
+def _checkpoint_path(checkpoint_dir, config_idx):
+    return os.path.join(checkpoint_dir, f"config_{config_idx}.pkl")
+
+def _save_atomic(path, write, mode="w"):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, mode) as f:
+        write(f)
+    os.replace(tmp_path, path) # an interrupted save never leaves a truncated checkpoint
+
+def _advance(job):
+    # Brings config `config_idx` up to `target_episodes` total episodes, resuming from its checkpoint
+    config_idx, config, seed_sequence, target_episodes, checkpoint_dir, window = job
+    path = _checkpoint_path(checkpoint_dir, config_idx)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            trainer = pickle.load(f)
+    else:
+        trainer = AntTrainer.from_config(config, rng=np.random.default_rng(seed_sequence))
+    new_episodes = max(0, target_episodes - trainer.episodes_done)
+    if new_episodes:
+        trainer.train(new_episodes, verbose=False)
+        _save_atomic(path, lambda f: pickle.dump(trainer, f), "wb")
+    return config_idx, rolling_food(trainer, window), trainer.episodes_done, new_episodes
+
+def successive_halving(configs, checkpoint_dir, min_episodes=10, growth=2, max_episodes=NUM_EPISODES,
+                       window=10, keep_fraction=0.5, seed=0, max_workers=1):
+    """
+    Runs successive halving over `configs` (dicts of AntTrainer.from_config overrides).
+    Round r trains every surviving config up to min_episodes * (growth**(r+1) - 1) / (growth - 1)
+    total episodes (capped at max_episodes), then keeps the best keep_fraction by the mean
+    food eaten over the last `window` episodes. Returns a table with one row per config:
+    its parameters, episodes trained, last score and the round it was dropped in.
+    """
+    if growth < 2:
+        raise ValueError(f"growth must be at least 2, got {growth}")
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    state_path = os.path.join(checkpoint_dir, "state.json")
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if state["configs"] != configs:
+            raise ValueError(f"{checkpoint_dir} holds a different sweep; use a new checkpoint directory")
+    else:
+        state = {"configs": configs, "round": 0, "alive": list(range(len(configs))),
+                 "scores": {}, "episodes": {}, "dropped_in_round": {}, "episodes_simulated": 0}
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(configs))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            round_idx = state["round"]
+            target = min(max_episodes, int(min_episodes * (growth**(round_idx + 1) - 1) / (growth - 1)))
+            jobs = [(i, configs[i], seed_sequences[i], target, checkpoint_dir, window) for i in state["alive"]]
+            for config_idx, score, episodes, new_episodes in pool.map(_advance, jobs):
+                state["scores"][str(config_idx)] = score
+                state["episodes"][str(config_idx)] = episodes
+                state["episodes_simulated"] += new_episodes
+
+            if len(state["alive"]) == 1 or target >= max_episodes:
+                break
+            ranked = sorted(state["alive"], key=lambda i: state["scores"][str(i)], reverse=True)
+            num_keep = max(1, int(len(ranked) * keep_fraction))
+            for config_idx in ranked[num_keep:]:
+                state["dropped_in_round"][str(config_idx)] = round_idx
+            state["alive"] = sorted(ranked[:num_keep])
+            state["round"] = round_idx + 1
+            _save_atomic(state_path, lambda f: json.dump(state, f))
+    _save_atomic(state_path, lambda f: json.dump(state, f))
+
+    rows = []
+    for config_idx, config in enumerate(configs):
+        rows.append({"config": config_idx, **config,
+                     "episodes": state["episodes"].get(str(config_idx), 0),
+                     "score": state["scores"].get(str(config_idx), np.nan),
+                     "dropped_in_round": state["dropped_in_round"].get(str(config_idx))})
+    table = pd.DataFrame(rows).sort_values(["episodes", "score"], ascending=False, ignore_index=True)
+    table.attrs["episodes_simulated"] = state["episodes_simulated"]
+    return table
+
+def load_checkpoint(checkpoint_dir, config_idx):
+    # Trained AntTrainer of one configuration (e.g. the winner) from a sweep's checkpoints
+    with open(_checkpoint_path(checkpoint_dir, config_idx), "rb") as f:
+        return pickle.load(f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search for the Santa Fe ant.")
+    parser.add_argument("--configs", type=int, default=16)
+    parser.add_argument("--min-episodes", type=int, default=10)
+    parser.add_argument("--growth", type=int, default=2)
+    parser.add_argument("--max-episodes", type=int, default=NUM_EPISODES)
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--memory-length", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-dir", default="successive_halving_checkpoints")
+    args = parser.parse_args()
+    if args.growth < 2:
+        parser.error("--growth must be at least 2")
+
+    fixed = {} if args.memory_length is None else {"memory_length": args.memory_length}
+    configs = sample_configs(args.configs, np.random.default_rng(args.seed), fixed=fixed)
+    start = time.perf_counter()
+    table = successive_halving(configs, args.checkpoint_dir, args.min_episodes, args.growth, args.max_episodes,
+                               args.window, seed=args.seed, max_workers=args.workers)
+    print(table.to_string())
+    full_cost = len(configs) * table["episodes"].max()
+    print(f"{table.attrs['episodes_simulated']} episodes simulated in {time.perf_counter() - start:.1f} s "
+          f"(vs {full_cost} to train every config as long as the winner, "
+          f"{full_cost / max(table.attrs['episodes_simulated'], 1):.1f}x less). Best: config {table['config'][0]}")
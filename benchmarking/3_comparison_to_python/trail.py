@@ -1,10 +1,26 @@
 import numpy as np
 
-def load_santa_fe_trail():
+_SANTA_FE_TRAIL = None # parsed once, see load_santa_fe_trail
+
+def load_santa_fe_trail(dtype=int):
     """
     Returns the 32×32 Santa Fe trail map as a NumPy array.
     1 indicates a food pellet or the start ('S'), 0 indicates empty.
+    The ASCII map is parsed on the first call; later calls return a fresh copy.
     """
+    global _SANTA_FE_TRAIL
+    if _SANTA_FE_TRAIL is None:
+        _SANTA_FE_TRAIL = _parse_santa_fe_trail()
+        _SANTA_FE_TRAIL.setflags(write=False)
+    return _SANTA_FE_TRAIL.astype(dtype)
+
+def use_santa_fe_trail(grid):
+    # Installs an already parsed map (e.g. a view of shared memory) as the cached one
+    global _SANTA_FE_TRAIL
+    grid.setflags(write=False)
+    _SANTA_FE_TRAIL = grid
+
+def _parse_santa_fe_trail():
     lines = [
         "S###............................",
         "...#............................",
@@ -41,6 +57,6 @@ def load_santa_fe_trail():
     ]
     # Build array: 1 for 'S' or '#', else 0
     grid = np.array([[1 if ch in ("S", "#") else 0 for ch in line]
-                     for line in lines], dtype=int)
+                     for line in lines], dtype=np.uint8)
     return grid
 
@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
+import os
+import sys
 import numpy as np
 import time
 import pandas as pd
+from fast_gl import causal_response_fft
 
-def simulate_rc_ladder(T, dt, Iin_amp=2e-6, alpha=0.8, stages=5):
+# Shared GL coefficient store and kernels live next to the ant benchmark
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarking', '3_comparison_to_python'))
+from gl_coefficients import get_gl_coefficients
+from kernels import get_kernel
+
+def simulate_rc_ladder(T, dt, Iin_amp=2e-6, alpha=0.8, stages=5, backend="numpy"):
     n_steps = int(T/dt)
     C0 = 1e-9
     flow = 0.1
@@ -16,40 +24,14 @@ def simulate_rc_ladder(T, dt, Iin_amp=2e-6, alpha=0.8, stages=5):
     Cs = [Cbase*(ratio**i) for i in range(stages)]
     Rleak = 500e3
 
-    v_mem = np.zeros(n_steps)
-    v = np.zeros(stages)
-
-    for i in range(n_steps):
-        if i == 0:
-            v_prev = v.copy()
-            vm = 0.0
-        else:
-            v_prev = v.copy()
-            vm = v_mem[i-1]
-
-        # membrane update
-        dvm = dt * (Iin_amp - vm/Rleak - (vm - v_prev[0])/Rs[0]) / C0
-        v_mem[i] = vm + dvm
-
-        # ladder updates
-        for j in range(stages):
-            vin = vm if j == 0 else v_prev[j-1]
-            if j < stages - 1:
-                vout = v_prev[j+1]
-                flow_rate = (vin - v_prev[j]) / Rs[j] - (v_prev[j] - vout) / Rs[j+1]
-            else:
-                flow_rate = (vin - v_prev[j]) / Rs[j]
-            v[j] = v_prev[j] + dt * flow_rate / Cs[j]
-
-    return v_mem
+    # Time loop runs in the selected kernel backend (numpy reference or numba)
+    rc_ladder = get_kernel("rc_ladder", backend)
+    return rc_ladder(n_steps, dt, Iin_amp, np.array(Rs), np.array(Cs), C0, Rleak)
 
 def simulate_fractional(T, dt, order=0.8, Iin_amp=2e-6):
     n_steps = int(T/dt)
-    # Grünwald–Letnikov weights
-    w = np.zeros(n_steps)
-    w[0] = 1.0
-    for k in range(1, n_steps):
-        w[k] = w[k-1] * ((order - (k-1)) / k)
+    # Grünwald–Letnikov weights (shared, read-only)
+    w = get_gl_coefficients(order, n_steps, "binomial")
 
     v = np.zeros(n_steps)
     for i in range(n_steps):
@@ -57,6 +39,13 @@ def simulate_fractional(T, dt, order=0.8, Iin_amp=2e-6):
 
     return v
 
+def simulate_fractional_fft(T, dt, order=0.8, Iin_amp=2e-6):
+    # Same response as simulate_fractional, with the weight/input convolution done by FFT
+    n_steps = int(T/dt)
+    w = get_gl_coefficients(order, n_steps, "binomial")
+
+    return (dt**order) * causal_response_fft(w, Iin_amp * np.ones(n_steps))
+
 def benchmark(fn, **kwargs):
     t0 = time.perf_counter()
     fn(**kwargs)
@@ -77,6 +66,8 @@ def main():
                          Iin_amp=Iin_amp, alpha=alpha, stages=stages)
     t_frac   = benchmark(simulate_fractional, T=T, dt=dt,
                          order=order, Iin_amp=Iin_amp)
+    t_frac_fft = benchmark(simulate_fractional_fft, T=T, dt=dt,
+                           order=order, Iin_amp=Iin_amp)
 
     # Compute metrics
     steps              = int(T/dt)
@@ -86,14 +77,15 @@ def main():
     dt_min_frac        = ops_frac / f_clk
     throughput_ladder  = steps / t_ladder
     throughput_frac    = steps / t_frac
+    throughput_frac_fft = steps / t_frac_fft
 
     # Tabulate and print
     df = pd.DataFrame({
-        'Implementation':    ['RC-ladder',      'Frac-deriv'],
-        'Python runtime (s)': [t_ladder,         t_frac],
-        'Steps/sec':         [throughput_ladder, throughput_frac],
-        'Ops/step':          [ops_ladder,        ops_frac],
-        'Min Δt @100 MHz (s)': [dt_min_ladder,    dt_min_frac]
+        'Implementation':    ['RC-ladder',      'Frac-deriv',    'Frac-deriv (FFT)'],
+        'Python runtime (s)': [t_ladder,         t_frac,          t_frac_fft],
+        'Steps/sec':         [throughput_ladder, throughput_frac, throughput_frac_fft],
+        'Ops/step':          [ops_ladder,        ops_frac,        ops_frac],
+        'Min Δt @100 MHz (s)': [dt_min_ladder,    dt_min_frac,     dt_min_frac]
     })
 
     print('\nBenchmark comparison (T = {:.3f}s, dt = {:.1e}s):'.format(T, dt))
@@ -1,7 +1,15 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
+from fast_gl import simulate_GL_fft
 
-def simulate_rc_ladder(T, dt, Iin_amp=2e-6, alpha=0.8, stages=5):
+# Shared GL coefficient store lives next to the ant benchmark
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarking', '3_comparison_to_python'))
+from gl_coefficients import get_gl_coefficients, memory_length_for_tolerance
+from kernels import get_kernel
+
+def simulate_rc_ladder(T, dt, Iin_amp=2e-6, alpha=0.8, stages=5, backend="numpy"):
     n_steps = int(T/dt)
     C0 = 1e-9
     flow = 0.1
@@ -14,33 +22,17 @@ def simulate_rc_ladder(T, dt, Iin_amp=2e-6, alpha=0.8, stages=5):
     Cs = [Cbase*(ratio**i) for i in range(stages)]
     Rleak = 500e3
 
-    v_mem = np.zeros(n_steps)
-    v = np.zeros(stages)
-
-    for i in range(n_steps):
-        v_prev = v.copy()
-        vm = v_mem[i-1] if i > 0 else 0.0
-
-        # Update membrane voltage
-        dvm = dt * (Iin_amp - vm/Rleak - (vm - v_prev[0])/Rs[0]) / C0
-        v_mem[i] = vm + dvm
-
-        # Update ladder nodes
-        for j in range(stages):
-            vin = vm if j == 0 else v_prev[j-1]
-            if j < stages - 1:
-                vout = v_prev[j+1]
-                flow_rate = (vin - v_prev[j]) / Rs[j] - (v_prev[j] - vout) / Rs[j+1]
-            else:
-                flow_rate = (vin - v_prev[j]) / Rs[j]
-            v[j] = v_prev[j] + dt * flow_rate / Cs[j]
-
-    return v_mem
+    # Time loop runs in the selected kernel backend (numpy reference or numba)
+    rc_ladder = get_kernel("rc_ladder", backend)
+    return rc_ladder(n_steps, dt, Iin_amp, np.array(Rs), np.array(Cs), C0, Rleak)
 
-def simulate_GL(dt, T, Tmem, tref, Cm, gl, Vl, Vth, Vinit, Vreset, Vpeak, Iapp, alpha):
+def simulate_GL(dt, T, Tmem, tref, Cm, gl, Vl, Vth, Vinit, Vreset, Vpeak, Iapp, alpha, mem_tol=None):
     import numpy as np
     n_steps = int(T / dt)
-    if Tmem > 0:
+    if mem_tol is not None:
+        # Memory window from an error tolerance on the truncated GL mass (overrides Tmem)
+        n_mem = min(memory_length_for_tolerance(alpha, mem_tol) + 1, n_steps) # no more history than steps
+    elif Tmem > 0:
         n_mem = int(Tmem / dt)
     else:
         n_mem = n_steps
@@ -49,11 +41,8 @@ def simulate_GL(dt, T, Tmem, tref, Cm, gl, Vl, Vth, Vinit, Vreset, Vpeak, Iapp,
     V = Vl * np.ones(n_steps)
     spikes = []
 
-    # Compute Grünwald–Letnikov coefficients
-    coeffs = np.ones(n_mem)
-    for i in range(1, n_mem):
-        coeffs[i] = coeffs[i-1] * (1 - (1+alpha)/i)
-    coeffs = coeffs[1:]
+    # Grünwald–Letnikov coefficients (shared, read-only)
+    coeffs = get_gl_coefficients(alpha, n_mem, "gl")[1:]
 
     DeltaM = np.ones(len(coeffs)) * Vinit
     tprev_spike = 2 * tref
@@ -90,6 +79,7 @@ alpha = 0.8
 stages = 5
 # GL parameters
 Tmem = 0    # use full history
+mem_tol = None    # or e.g. 1e-3 to pick the memory window from the GL tail mass
 tref = 0.005
 Cm = 1e-9
 gl = 1/500e3
@@ -107,8 +97,8 @@ for Iin in Iin_values:
     v_ladder = simulate_rc_ladder(T, dt, Iin_amp=Iin, alpha=alpha, stages=stages)
     rates_ladder.append(compute_spike_rate(v_ladder, dt))
 
-    # GL-LIF spike rate
-    V_gl, _, spikes = simulate_GL(dt, T, Tmem, tref, Cm, gl, Vl, Vth, Vinit, Vreset, Vpeak, Iin, alpha)
+    # GL-LIF spike rate (FFT-blocked full history, same trajectory as simulate_GL)
+    V_gl, _, spikes = simulate_GL_fft(dt, T, Tmem, tref, Cm, gl, Vl, Vth, Vinit, Vreset, Vpeak, Iin, alpha, mem_tol)
     rates_gl.append(len(spikes) / T)
 
 # Plotting
@@ -1,7 +1,13 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 
-def analyze_spike_adaptation(filepath="output_data.txt", threshold=2.5, min_isi=1e-6):
+# Kernel backends (numpy / numba) live next to the ant benchmark
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarking', '3_comparison_to_python'))
+from kernels import get_kernel
+
+def analyze_spike_adaptation(filepath="output_data.txt", threshold=2.5, min_isi=1e-6, backend="numpy"):
     """
     Analyzes spike rate adaptation from ngspice output data.
 
@@ -10,6 +16,7 @@ def analyze_spike_adaptation(filepath="output_data.txt", threshold=2.5, min_isi=
         threshold (float): Voltage threshold for detecting spikes from Vcomp_out.
         min_isi (float): Minimum inter-spike interval to filter out spurious detections
                          due to simulation noise or very fast switching.
+        backend (str): Kernel backend for edge and ISI detection, "numpy" or "numba".
     """
     try:
         time = []
@@ -71,11 +78,9 @@ def analyze_spike_adaptation(filepath="output_data.txt", threshold=2.5, min_isi=
         return
 
     # --- Spike Detection ---
-    spike_times = []
-    # Iterate through Vcomp_out to detect rising edges
-    for i in range(1, len(vcomp_out)):
-        if vcomp_out[i] >= threshold and vcomp_out[i-1] < threshold:
-            spike_times.append(time[i])
+    # Rising edges of Vcomp_out
+    rising_edges = get_kernel("rising_edges", backend)
+    spike_times = time[rising_edges(vcomp_out, threshold)]
 
     print(f"Detected {len(spike_times)} spikes.")
 
@@ -84,21 +89,17 @@ def analyze_spike_adaptation(filepath="output_data.txt", threshold=2.5, min_isi=
         print("Not enough spikes to calculate ISIs.")
         return
 
-    isis = []
-    isi_mid_times = [] # Time point at the midpoint of the ISI for plotting
-    for i in range(1, len(spike_times)):
-        current_isi = spike_times[i] - spike_times[i-1]
-        if current_isi > min_isi: # Filter out very small, possibly spurious ISIs
-            isis.append(current_isi)
-            isi_mid_times.append((spike_times[i] + spike_times[i-1]) / 2)
+    # Filter out very small, possibly spurious ISIs; midpoints of the ISIs are used for plotting
+    isi = get_kernel("isi", backend)
+    isis, isi_mid_times = isi(spike_times, min_isi)
 
 
     # --- Calculate Instantaneous Firing Rate (1/ISI) ---
-    if not isis:
+    if len(isis) == 0:
         print("No valid ISIs to calculate firing rate.")
         return
 
-    firing_rates = [1.0 / isi for isi in isis]
+    firing_rates = 1.0 / isis
 
 
     # --- Plotting ---
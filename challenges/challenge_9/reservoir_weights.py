@@ -0,0 +1,85 @@
+import warnings
+import numpy as np
+
+# Recurrent weight construction for the simpleLSM liquid state machine.
+# Dense construction draws an N x N matrix and normalizes it by np.linalg.eigvals, which
+# is O(N^3) time and O(N^2) memory. Here W can instead be drawn directly in compressed
+# sparse column (CSC) form, and the spectral radius is estimated by power iteration,
+# which only needs W @ x (O(nnz) per iteration for CSC). Reservoir weights are
+# nonnegative, so the spectral radius is the Perron root and the Collatz-Wielandt
+# bounds min(Wx / x) <= rho <= max(Wx / x) give a guaranteed stopping tolerance.
+
+def sparse_random_reservoir(n, connectivity, rng=np.random, index_dtype=np.int32):
+    """
+    CSC (indptr, indices, data) of an n x n matrix with the same distribution as the dense
+    construction: every off-diagonal entry is nonzero with probability `connectivity`,
+    with a uniform [0, 1) value. The positions of the nonzeros (column-major) are drawn as
+    geometric gaps, so time and memory are O(nnz) instead of O(n^2).
+    """
+    total = n * n
+    positions = [np.zeros(0, dtype=np.int64)]
+    last = -1
+    while connectivity > 0 and last < total:
+        # Enough gaps to reach the end with high probability; loops again if not
+        expected = (total - last - 1) * connectivity
+        chunk = last + np.cumsum(rng.geometric(connectivity, size=int(expected + 6 * np.sqrt(expected)) + 16))
+        positions.append(chunk)
+        last = chunk[-1]
+    positions = np.concatenate(positions)
+    positions = positions[positions < total]
+    cols, rows = np.divmod(positions, n)
+    keep = rows != cols # no self-connections
+    cols, rows = cols[keep], rows[keep]
+    indptr = np.zeros(n + 1, dtype=index_dtype)
+    np.cumsum(np.bincount(cols, minlength=n), out=indptr[1:])
+    return indptr, rows.astype(index_dtype), rng.random(rows.size)
+
+def spectral_radius(W, tol=1e-8, max_iter=10000):
+    """
+    Spectral radius of a nonnegative matrix, given dense or as a CSC (indptr, indices, data)
+    tuple, by power iteration on W + I (the shift keeps it converging for periodic W).
+    Stops once the Collatz-Wielandt bounds agree to the relative tolerance `tol`.
+    """
+    if isinstance(W, tuple):
+        indptr, indices, data = W
+        n = indptr.size - 1
+        cols = np.repeat(np.arange(n), np.diff(indptr))
+        matvec = lambda x: np.bincount(indices, weights=data * x[cols], minlength=n)
+    else:
+        n = W.shape[0]
+        matvec = lambda x: W @ x
+    x = np.ones(n)
+    for _ in range(max_iter):
+        Wx = matvec(x)
+        # Components outside the dominant part (e.g. neurons without inputs) decay to 0 and are left out
+        support = x > np.sqrt(np.finfo(float).eps) * x.max()
+        ratios = Wx[support] / x[support]
+        lower, upper = ratios.min(), ratios.max()
+        if upper - lower <= tol * upper:
+            return float((lower + upper) / 2)
+        x = Wx + x
+        x /= x.max()
+    warnings.warn(f"Power iteration did not reach tolerance {tol:g} in {max_iter} iterations "
+                  f"(bounds {lower:.6g}..{upper:.6g})")
+    return float(upper)
+
+def check_spectral_radius(n=64, connectivity=0.2, tol=1e-8, seed=0):
+    """
+    Power-iteration radius of a small random reservoir, dense and in CSC form, against the
+    exact np.linalg.eigvals radius. Returns {form: relative error}; both must be <= tol.
+    """
+    rng = np.random.default_rng(seed)
+    indptr, indices, data = sparse_random_reservoir(n, connectivity, rng)
+    W = np.zeros((n, n))
+    W[indices, np.repeat(np.arange(n), np.diff(indptr))] = data
+    exact = np.max(np.abs(np.linalg.eigvals(W)))
+    return {"dense": abs(spectral_radius(W, tol) - exact) / exact,
+            "csc": abs(spectral_radius((indptr, indices, data), tol) - exact) / exact}
+
+if __name__ == "__main__":
+    tol = 1e-8
+    errors = check_spectral_radius(tol=tol)
+    for form, error in errors.items():
+        print(f"{form:6s} relative error vs eigvals {error:.2e} ({'ok' if error <= tol else 'MISMATCH'})")
+    if any(error > tol for error in errors.values()):
+        raise SystemExit(1)
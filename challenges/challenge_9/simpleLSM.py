@@ -1,6 +1,21 @@
+import copy
+import os
+import sys
 import numpy as np
 import time
 import matplotlib.pyplot as plt
+from reservoir_weights import sparse_random_reservoir, spectral_radius as estimate_spectral_radius
+from state_cache import StateCache, cache_key
+
+# Kernel backends (numpy / numba) live next to the ant benchmark
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarking', '3_comparison_to_python'))
+from kernels import get_kernel
+from alloc_profiler import AllocationProfiler
+
+# Dense reservoirs up to this size are normalized by the exact spectral radius (all
+# eigenvalues, O(N^3)); larger and sparse ones use power iteration to DEFAULT_SPECTRAL_TOL
+EXACT_SPECTRAL_RADIUS_MAX_N = 1000
+DEFAULT_SPECTRAL_TOL = 1e-8
 
 class SpikingLiquidStateMachine:
     def __init__(self, 
@@ -11,7 +26,12 @@ class SpikingLiquidStateMachine:
                  leak_rate=0.2, 
                  threshold=0.5, 
                  resting_potential=0.0, 
-                 refractory_period=2):
+                 refractory_period=2,
+                 dtype=np.float64,
+                 backend="numpy",
+                 sparse=False,
+                 batch_size=None,
+                 spectral_tol=None):
         
         self.n_reservoir = n_reservoir
         self.connectivity = connectivity
@@ -21,12 +41,34 @@ class SpikingLiquidStateMachine:
         self.threshold = threshold
         self.resting_potential = resting_potential
         self.refractory_period = refractory_period
-
-        # Initialize reservoir weights
-        self.W = np.random.rand(n_reservoir, n_reservoir)
-        self.W[np.random.rand(*self.W.shape) > connectivity] = 0
-        self.W = self.W - np.diag(np.diag(self.W))  # Remove self-connections
-        self.W = self.W / np.max(np.abs(np.linalg.eigvals(self.W))) * spectral_radius
+        # Storage/compute dtype of weights and neuron state (np.float32 halves the W traffic)
+        self.dtype = np.dtype(dtype)
+        # "numpy" or "numba" implementation of step() (see kernels.py)
+        self.backend = backend
+        # Event-driven recurrent input: W is kept in CSC form and step() only adds up the
+        # columns of the neurons that fired, so its cost is spikes x fan-out instead of N^2
+        self.sparse = sparse
+        self._step_kernel = get_kernel("lsm_step_sparse" if sparse else "lsm_step", backend)
+
+        # Initialize reservoir weights. With spectral_tol the spectral radius comes from power
+        # iteration to that relative tolerance; None keeps the exact eigenvalues for dense
+        # reservoirs of up to EXACT_SPECTRAL_RADIUS_MAX_N neurons. A sparse reservoir is drawn
+        # directly in CSC form and never builds the N x N matrix.
+        if sparse:
+            self.W_indptr, self.W_indices, W_data = sparse_random_reservoir(n_reservoir, connectivity)
+            radius = estimate_spectral_radius((self.W_indptr, self.W_indices, W_data),
+                                              DEFAULT_SPECTRAL_TOL if spectral_tol is None else spectral_tol)
+            self.W_data = (W_data / radius * spectral_radius).astype(self.dtype)
+            self.W = None
+        else:
+            self.W = np.random.rand(n_reservoir, n_reservoir)
+            self.W[np.random.rand(*self.W.shape) > connectivity] = 0
+            self.W = self.W - np.diag(np.diag(self.W))  # Remove self-connections
+            if spectral_tol is None and n_reservoir <= EXACT_SPECTRAL_RADIUS_MAX_N:
+                radius = np.max(np.abs(np.linalg.eigvals(self.W)))
+            else:
+                radius = estimate_spectral_radius(self.W, DEFAULT_SPECTRAL_TOL if spectral_tol is None else spectral_tol)
+            self.W = self.W / radius * spectral_radius
 
         # Initialize input weights
         self.W_in = np.random.rand(n_reservoir) 
@@ -35,39 +77,116 @@ class SpikingLiquidStateMachine:
         self.W_out = np.random.rand(1, n_reservoir)
 
         self.W_out[:][np.random.rand(*self.W_out.shape) > connectivity] = 0
+
+        # Weights are drawn and normalized in float64, then stored in the working dtype
+        if not sparse:
+            self.W = self.W.astype(self.dtype)
+        self.W_in = self.W_in.astype(self.dtype)
+        self.W_out = self.W_out.astype(self.dtype)
         
         # Initialize neuron states
-        self.neuron_states = np.zeros(n_reservoir)
-        self.neuron_spikes = np.zeros(n_reservoir)
-        self.fired = np.zeros(n_reservoir, dtype=bool)
-        self.refractory_counters = np.zeros(n_reservoir, dtype=int)
+        self.reset_state(batch_size)
+
+    def reset_state(self, batch_size=None):
+        # Resting reservoir; with batch_size=B it holds B independent state rows that share
+        # the weights, and step() takes B inputs (one per row)
+        if batch_size is not None and self.sparse:
+            raise ValueError("batch_size is only supported with the dense reservoir (sparse=False)")
+        self.batch_size = batch_size
+        self._batch_kernel = None if batch_size is None else get_kernel("lsm_step_batch", self.backend)
+        shape = (self.n_reservoir,) if batch_size is None else (batch_size, self.n_reservoir)
+        self.neuron_states = np.zeros(shape, dtype=self.dtype)
+        self.neuron_spikes = np.zeros(shape, dtype=self.dtype)
+        self.fired = np.zeros(shape, dtype=bool)
+        self.refractory_counters = np.zeros(shape, dtype=int)
     
-        self.neuron_spikes_prev = np.zeros(n_reservoir)
+        self.neuron_spikes_prev = np.zeros(shape, dtype=self.dtype)
 
     def step(self, input_signal):
-        self.neuron_spikes = self.fired.astype(int) 
-        total_input = np.dot(self.W, self.neuron_spikes) + self.W_in * input_signal * self.input_scaling
-
-        # Refractory handling: block input accumulation for refractory neurons
-        refractory_mask = self.refractory_counters > 0
-        total_input[refractory_mask] = 0
+        self.neuron_spikes = self.fired.astype(self.dtype)
+        if self.batch_size is not None:
+            # (B, N) states, B inputs, number fired per reservoir
+            self.neuron_states, self.fired, num_fired = self._batch_kernel(
+                self.W, self.W_in, self.fired, self.neuron_states, self.refractory_counters,
+                np.asarray(input_signal, dtype=self.dtype), self.input_scaling, self.leak_rate, self.threshold,
+                self.resting_potential, self.refractory_period)
+            return self.neuron_states, num_fired
+        weights = (self.W_indptr, self.W_indices, self.W_data) if self.sparse else (self.W,)
+        self.neuron_states, self.fired, num_fired = self._step_kernel(
+            *weights, self.W_in, self.fired, self.neuron_states, self.refractory_counters, input_signal,
+            self.input_scaling, self.leak_rate, self.threshold, self.resting_potential, self.refractory_period)
+        return self.neuron_states, num_fired
 
-        # Update neuron states with leak and input
-        self.neuron_states = (1 - self.leak_rate) * self.neuron_states + total_input
+    def predict(self, reservoir_activations):
+        if reservoir_activations.ndim == 2: # (B, N) batch -> (1, B)
+            return np.dot(self.W_out, reservoir_activations.T)
+        return np.dot(self.W_out, reservoir_activations)
+        #return (np.tanh(np.dot(self.W_out, reservoir_activations)) + 1) / 2
 
-        # Detect spiking neurons
-        self.fired = self.neuron_states > self.threshold
-        self.neuron_states[self.fired] = self.resting_potential
+    def astype(self, dtype):
+        # Copy of this reservoir (same weights and state) stored and stepped in another dtype
+        lsm = copy.deepcopy(self)
+        lsm.dtype = np.dtype(dtype)
+        for name in ("W_data" if self.sparse else "W", "W_in", "W_out", "neuron_states", "neuron_spikes", "neuron_spikes_prev"):
+            setattr(lsm, name, getattr(lsm, name).astype(lsm.dtype))
+        return lsm
+
+
+def precision_validation_report(lsm, input_signal, dtype=np.float32):
+    # Steps a float64 copy and a reduced-precision copy of lsm on the same inputs and
+    # reports where their spike rasters start to diverge
+    reference = lsm.astype(np.float64)
+    reduced = lsm.astype(dtype)
+
+    first_divergent_step = None
+    divergent_steps = 0
+    mismatched_spikes = 0
+    reference_spikes, reduced_spikes = 0, 0
+    max_state_deviation = 0.0
+    for step_idx, value in enumerate(input_signal):
+        reference_states, _ = reference.step(value)
+        reduced_states, _ = reduced.step(value)
+        mismatch = np.count_nonzero(reference.fired != reduced.fired)
+        if mismatch:
+            divergent_steps += 1
+            mismatched_spikes += mismatch
+            if first_divergent_step is None:
+                first_divergent_step = step_idx
+        reference_spikes += int(np.count_nonzero(reference.fired))
+        reduced_spikes += int(np.count_nonzero(reduced.fired))
+        max_state_deviation = max(max_state_deviation,
+                                  np.max(np.abs(reference_states - reduced_states.astype(np.float64))))
 
-        self.refractory_counters[self.fired] = self.refractory_period
+    return {
+        "dtype": np.dtype(dtype).name,
+        "steps": len(input_signal),
+        "reference_spikes": reference_spikes,
+        "reduced_spikes": reduced_spikes,
+        "first_divergent_step": first_divergent_step,
+        "divergent_steps": divergent_steps,
+        "mismatched_spikes": mismatched_spikes,
+        "max_state_deviation": float(max_state_deviation),
+    }
 
-        # Reduce refractory counters
-        self.refractory_counters[refractory_mask] -= 1
-        return self.neuron_states, sum(self.fired)
 
-    def predict(self, reservoir_activations):
-        return np.dot(self.W_out, reservoir_activations)
-        #return (np.tanh(np.dot(self.W_out, reservoir_activations)) + 1) / 2
+def window_states(lsm, inp, input_window_size, batch_size=256):
+    # Final reservoir state of every input window inp[i:i+input_window_size], each window
+    # started from a resting reservoir (training_loop instead carries the state from one
+    # window to the next). Windows are stepped batch_size at a time, one (B, N) x (N, N)
+    # product per time step. Returns a (num_windows, N) array; row i belongs to target
+    # inp[i + input_window_size].
+    inp = np.asarray(inp, dtype=lsm.dtype)
+    num_windows = len(inp) - input_window_size
+    windows = np.lib.stride_tricks.sliding_window_view(inp, input_window_size)[:num_windows]
+    batched = copy.copy(lsm) # shares the weights, gets its own state arrays
+    states = np.empty((num_windows, lsm.n_reservoir), dtype=lsm.dtype)
+    for start in range(0, num_windows, batch_size):
+        chunk = windows[start:start + batch_size]
+        batched.reset_state(len(chunk))
+        for t in range(input_window_size):
+            reservoir_activations, _ = batched.step(chunk[:, t])
+        states[start:start + len(chunk)] = reservoir_activations
+    return states
 
 
 def train_output_layer(lsm, input_sequence, target, learning_rate):
@@ -163,6 +282,207 @@ def benchmark_lsm(lsm, num_epochs, input_window_size, input_signal, learning_rat
 
 
 
+# --- Closed-form (ridge) readout ---
+# The readout is linear and the reservoir does not depend on W_out, so instead of
+# hundreds of LMS epochs the states can be recorded once and W_out solved for directly:
+#     W_out = argmin ||X W - y||^2 + lambda ||W||^2 = (X^T X + lambda I)^-1 X^T y
+# States are consumed in chunks and only the N x N Gram matrices X^T X and X^T y are
+# kept (one per cross-validation fold), so memory does not grow with the series length.
+# Lambda is picked by k-fold cross-validation over contiguous blocks of windows; the fold
+# errors also come from the fold Gram matrices. Lambdas are relative to the mean
+# diagonal of X^T X, so the same grid fits any reservoir size or input scaling.
+
+RIDGE_LAMBDAS = np.logspace(-8, 1, 10)
+
+def collect_states(lsm, inp, input_window_size, chunk_size=1024, independent_windows=False):
+    # Yields (states, targets) chunks of at most chunk_size windows. By default the
+    # reservoir is stepped through the windows in order with its state carried over, like
+    # training_loop; independent_windows=True starts every window from rest (window_states).
+    num_windows = len(inp) - input_window_size
+    targets = np.asarray(inp[input_window_size:], dtype=np.float64)
+    for start in range(0, num_windows, chunk_size):
+        stop = min(start + chunk_size, num_windows)
+        if independent_windows:
+            states = window_states(lsm, inp[start:stop + input_window_size], input_window_size)
+        else:
+            states = np.empty((stop - start, lsm.n_reservoir), dtype=lsm.dtype)
+            for i in range(start, stop):
+                for value in inp[i:i + input_window_size]:
+                    reservoir_activations, _ = lsm.step(value)
+                states[i - start] = reservoir_activations
+        yield states, targets[start:stop]
+
+# --- Reservoir state cache ---
+# Readout sweeps (ridge lambdas, RLS settings, ...) re-run the same reservoir over the same
+# series. cached_states() keeps the state matrix in a StateCache (memory-mapped .npy, LRU
+# size cap) keyed by everything the states depend on: the hyperparameters, the weights and
+# the current state of the reservoir (so the key is right without knowing the seed), the
+# input series and the windowing. The states are always computed on a copy, so unlike
+# collect_states the reservoir itself is not stepped, hit or miss (fit_ridge_readout
+# also leaves it unstepped without a cache).
+
+STATE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state_cache")
+
+def reservoir_cache_key(lsm, inp, input_window_size, independent_windows=False):
+    weights = (lsm.W_indptr, lsm.W_indices, lsm.W_data) if lsm.sparse else (lsm.W,)
+    # Every constructor argument that changes the states; spectral_tol only acts through the weights
+    hyperparameters = (lsm.n_reservoir, lsm.connectivity, lsm.spectral_radius, lsm.input_scaling, lsm.leak_rate,
+                       lsm.threshold, lsm.resting_potential, lsm.refractory_period, lsm.dtype.str, lsm.backend,
+                       lsm.sparse, lsm.batch_size)
+    return cache_key("lsm_states", hyperparameters, *weights, lsm.W_in, lsm.neuron_states, lsm.fired,
+                     lsm.refractory_counters, np.asarray(inp, dtype=np.float64), input_window_size,
+                     independent_windows)
+
+def cached_states(lsm, inp, input_window_size, cache, independent_windows=False):
+    # (num_windows, N) read-only memmap of the final state of every window (see collect_states)
+    def compute():
+        return np.concatenate([states for states, _ in collect_states(copy.deepcopy(lsm), inp, input_window_size,
+                                                                      independent_windows=independent_windows)])
+    return cache.get_or_compute(reservoir_cache_key(lsm, inp, input_window_size, independent_windows), compute)
+
+def fit_ridge_readout(lsm, inp, input_window_size, lambdas=RIDGE_LAMBDAS, folds=5, chunk_size=1024,
+                      independent_windows=False, cache=None):
+    """
+    Records the reservoir states of every window once and sets lsm.W_out to the ridge
+    solution for the lambda (relative to the mean diagonal of X^T X) with the lowest
+    k-fold cross-validated mean squared error. Returns the chosen lambda and the CV errors.
+    The states are recorded on a copy, so the reservoir is not stepped; with a StateCache
+    they come from cached_states().
+    """
+    n = lsm.n_reservoir
+    num_windows = len(inp) - input_window_size
+    gram = np.zeros((folds, n, n))
+    cross = np.zeros((folds, n))
+    target_energy = np.zeros(folds)
+    counts = np.zeros(folds, dtype=int)
+    fold_of = np.arange(num_windows) * folds // num_windows # contiguous blocks
+    if cache is not None:
+        all_states = cached_states(lsm, inp, input_window_size, cache, independent_windows)
+        all_targets = np.asarray(inp[input_window_size:], dtype=np.float64)
+        chunks = ((all_states[i:i + chunk_size], all_targets[i:i + chunk_size]) for i in range(0, num_windows, chunk_size))
+    else:
+        chunks = collect_states(copy.deepcopy(lsm), inp, input_window_size, chunk_size, independent_windows)
+    offset = 0
+    for states, targets in chunks:
+        states = states.astype(np.float64)
+        chunk_folds = fold_of[offset:offset + len(targets)]
+        for k in np.unique(chunk_folds):
+            rows = chunk_folds == k
+            gram[k] += states[rows].T @ states[rows]
+            cross[k] += states[rows].T @ targets[rows]
+            target_energy[k] += targets[rows] @ targets[rows]
+            counts[k] += np.count_nonzero(rows)
+        offset += len(targets)
+
+    gram_total, cross_total = gram.sum(axis=0), cross.sum(axis=0)
+    scale = max(np.trace(gram_total) / n, np.finfo(float).tiny)
+    identity = np.eye(n)
+    cv_errors = np.zeros(len(lambdas))
+    for li, lam in enumerate(lambdas):
+        for k in range(folds):
+            w = np.linalg.solve(gram_total - gram[k] + lam * scale * identity, cross_total - cross[k])
+            # Held-out squared error from the fold's Gram matrix: ||X_k w - y_k||^2
+            cv_errors[li] += w @ gram[k] @ w - 2 * w @ cross[k] + target_energy[k]
+    cv_errors /= num_windows
+    best = int(np.argmin(cv_errors))
+    w = np.linalg.solve(gram_total + lambdas[best] * scale * identity, cross_total)
+    lsm.W_out = w[None, :].astype(lsm.dtype)
+    return {"ridge_lambda": float(lambdas[best]), "lambdas": np.asarray(lambdas), "cv_mse": cv_errors,
+            "num_windows": num_windows}
+
+def readout_error(lsm, inp, input_window_size):
+    # Mean absolute error of the current readout over one pass of the series (no training)
+    errors = []
+    for i in range(len(inp) - input_window_size):
+        for value in inp[i:i + input_window_size]:
+            reservoir_activations, _ = lsm.step(value)
+        errors.append(abs(inp[i + input_window_size] - lsm.predict(reservoir_activations)))
+    return float(np.mean(errors))
+
+def benchmark_ridge_readout(lsm, input_window_size, input_signal, lms_result=None, **fit_kwargs):
+    print("\nBenchmarking ridge readout")
+    start = time.time()
+    fit = fit_ridge_readout(lsm, input_signal, input_window_size, **fit_kwargs)
+    train_time = time.time() - start
+    final_error = readout_error(lsm, input_signal, input_window_size)
+
+    print("\nRidge Readout Report:")
+    print(f"- Windows: {fit['num_windows']}, cross-validated lambda: {fit['ridge_lambda']:.1e} "
+          f"(CV MSE {fit['cv_mse'].min():.3e})")
+    print(f"- Total training time: {train_time:.4f} seconds")
+    print(f"- Final training error: {final_error:.6f}")
+    if lms_result is not None:
+        print(f"- vs LMS ({lms_result['train_time_sec']:.2f} s, error {lms_result['final_error']:.6f}): "
+              f"{lms_result['train_time_sec'] / train_time:.0f}x faster, "
+              f"error ratio {final_error / lms_result['final_error']:.3f}")
+    return {"reservoir_size": lsm.n_reservoir, "train_time_sec": train_time, "final_error": final_error, **fit}
+
+
+# --- Online (RLS / FORCE) readout ---
+# Recursive least squares keeps P, the inverse of the exponentially weighted state
+# correlation matrix, and updates it with one rank-1 step per sample:
+#     k = P x / (forgetting_factor + x^T P x)
+#     W += k * (target - W x)
+#     P = (P - k (P x)^T) / forgetting_factor
+# so the readout converges in a single pass and keeps tracking a drifting target
+# (forgetting_factor < 1 discounts old samples). Each update costs O(M^2) for M readout
+# neurons; `neurons` restricts the readout to a subset of the reservoir to bound it.
+
+class RLSReadout:
+    def __init__(self, lsm, forgetting_factor=0.999, delta=1.0, neurons=None):
+        self.lsm = lsm
+        self.forgetting_factor = forgetting_factor
+        self.neurons = np.arange(lsm.n_reservoir) if neurons is None else np.asarray(neurons)
+        m = len(self.neurons)
+        self.P = np.eye(m) / delta # delta: initial state correlation (regularization)
+        self.w = lsm.W_out[0, self.neurons].astype(np.float64)
+        # Neurons outside the subset do not contribute to predict()
+        lsm.W_out = np.zeros_like(lsm.W_out)
+        lsm.W_out[0, self.neurons] = self.w
+
+    def update(self, reservoir_activations, target):
+        # One RLS step on this sample; returns the a priori error (before the update)
+        x = reservoir_activations[self.neurons].astype(np.float64)
+        Px = self.P @ x
+        gain = Px / (self.forgetting_factor + x @ Px)
+        error = target - self.w @ x
+        self.w += gain * error
+        self.P -= np.outer(gain, Px)
+        self.P /= self.forgetting_factor
+        self.lsm.W_out[0, self.neurons] = self.w
+        return error
+
+def train_rls_readout(lsm, inp, input_window_size, forgetting_factor=0.999, delta=1.0, neurons=None):
+    # One pass over the series, stepping the reservoir like training_loop and updating the readout per window
+    readout = RLSReadout(lsm, forgetting_factor, delta, neurons)
+    errors = []
+    for i in range(len(inp) - input_window_size):
+        for value in inp[i:i + input_window_size]:
+            reservoir_activations, _ = lsm.step(value)
+        errors.append(abs(readout.update(reservoir_activations, inp[i + input_window_size])))
+    return readout, np.asarray(errors)
+
+def benchmark_rls_readout(lsm, input_window_size, input_signal, lms_result=None, **rls_kwargs):
+    print("\nBenchmarking RLS readout")
+    start = time.time()
+    readout, errors = train_rls_readout(lsm, input_signal, input_window_size, **rls_kwargs)
+    train_time = time.time() - start
+    final_error = readout_error(lsm, input_signal, input_window_size)
+
+    print("\nRLS Readout Report:")
+    print(f"- Readout neurons: {len(readout.neurons)}/{lsm.n_reservoir}, forgetting factor {readout.forgetting_factor}")
+    print(f"- Single-pass training time: {train_time:.4f} seconds")
+    print(f"- Online error, first/last 10% of the pass: {errors[:len(errors) // 10].mean():.6f} / "
+          f"{errors[-(len(errors) // 10):].mean():.6f}")
+    print(f"- Final training error: {final_error:.6f}")
+    if lms_result is not None:
+        print(f"- vs LMS ({lms_result['train_time_sec']:.2f} s, error {lms_result['final_error']:.6f}): "
+              f"{lms_result['train_time_sec'] / train_time:.0f}x faster, "
+              f"error ratio {final_error / lms_result['final_error']:.3f}")
+    return {"reservoir_size": lsm.n_reservoir, "train_time_sec": train_time, "final_error": final_error,
+            "online_errors": errors}
+
+
 with open("datasets/MG/mgdata.dat.txt", 'r') as file:
     lines = file.readlines()
 
@@ -170,12 +490,33 @@ mg = [float(line.split()[1]) for line in lines]
 
 
 N = 64
-lsm_critical = SpikingLiquidStateMachine(n_reservoir=N, input_scaling=0.105) 
 num_epochs = 500
 input_window_size = 5 
 learning_rate = 0.001
-
-benchmark_lsm(lsm_critical, num_epochs, input_window_size, mg, learning_rate)
+SPARSE_RESERVOIR = False # event-driven CSC recurrent input (pays off for large, sparsely firing reservoirs)
+RIDGE_READOUT = False # also fit a closed-form ridge readout on the same reservoir and compare it to LMS
+RLS_READOUT = False # also train an online RLS readout (one pass) on the same reservoir and compare it to LMS
+USE_STATE_CACHE = False # ridge readout reads reservoir states from STATE_CACHE_DIR instead of re-simulating
+MEMORY_PROFILE = False # tracemalloc profile of reservoir construction and the benchmark (slow, use fewer epochs)
+
+if MEMORY_PROFILE:
+    profiler = AllocationProfiler()
+    with profiler.phase("construct"):
+        lsm_critical = SpikingLiquidStateMachine(n_reservoir=N, input_scaling=0.105, sparse=SPARSE_RESERVOIR)
+    # training_loop steps the reservoir input_window_size times per sample, benchmark_lsm adds 10000 steps
+    with profiler.phase("benchmark", steps=num_epochs * (len(mg) - input_window_size) * input_window_size + 10000):
+        benchmark_lsm(lsm_critical, num_epochs, input_window_size, mg, learning_rate)
+    print("\n" + profiler.format_report())
+else:
+    lsm_critical = SpikingLiquidStateMachine(n_reservoir=N, input_scaling=0.105, sparse=SPARSE_RESERVOIR) 
+    lsm_ridge = copy.deepcopy(lsm_critical) # same reservoir and initial readout
+    lsm_rls = copy.deepcopy(lsm_critical)
+    lms_result = benchmark_lsm(lsm_critical, num_epochs, input_window_size, mg, learning_rate)
+    if RIDGE_READOUT:
+        benchmark_ridge_readout(lsm_ridge, input_window_size, mg, lms_result,
+                                cache=StateCache(STATE_CACHE_DIR) if USE_STATE_CACHE else None)
+    if RLS_READOUT:
+        benchmark_rls_readout(lsm_rls, input_window_size, mg, lms_result)
 '''
 avg_errors_critical, _ = training_loop(lsm_critical, num_epochs, input_window_size, mg, learning_rate)
 
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import numpy as np
+
+# On-disk cache of simulation trajectories (e.g. reservoir states) for parameter sweeps
+# that only change what is done with them (readouts, learning rates).
+# Entries are plain .npy files named by a SHA-256 key of everything that determines the
+# trajectory, and are opened with mmap_mode="r", so a hit costs no simulation and no copy:
+# slices of the returned array are read from the page cache on demand. Every hit or store
+# touches the file's mtime, and stores evict the least recently used entries until the
+# directory is under max_bytes. Writes go through a temporary file and os.replace, so
+# concurrent sweeps sharing a directory never see a partial entry.
+
+def cache_key(*parts):
+    # Hash of arrays (dtype, shape and bytes) and other values (repr); order matters
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            digest.update(f"ndarray{part.dtype.str}{part.shape}".encode())
+            digest.update(part.tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+class StateCache:
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def load(self, key):
+        # Read-only memory map of the entry, or None
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        os.utime(path) # most recently used
+        return array
+
+    def store(self, key, array):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(array))
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return np.load(path, mmap_mode="r")
+
+    def get_or_compute(self, key, compute):
+        # Cached array for key, running compute() and storing its result on a miss
+        array = self.load(key)
+        if array is not None:
+            self.hits += 1
+            return array
+        self.misses += 1
+        return self.store(key, compute())
+
+    def entries(self):
+        # (path, size, mtime) of every entry, least recently used first
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError: # evicted by another process
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        # Removes least recently used entries until the total size is within max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError: # already evicted by another process
+                pass
+            except OSError: # still mapped (Windows); leave it for a later eviction
+                continue
+            total -= size